@@ -18,5 +18,11 @@ else
     echo "CRITICAL: Java executable NOT found at $JAVA_HOME/bin/java"
 fi
 
+# Prometheus 다중 프로세스 메트릭 폴더 초기화 (이전 실행의 값이 섞이지 않도록)
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Web 컨테이너의 원래 CMD(Gunicorn)를 실행합니다.
 exec "$@"
\ No newline at end of file
@@ -0,0 +1,205 @@
+# engine/analysis_store.py
+'''형태소 분석 결과의 디스크 저장소 (SQLite).
+
+모델 버전이 같으면 같은 줄에 대한 Kiwi 분석 결과는 항상 같습니다.
+Worker가 재시작되어도 분석 결과가 남도록 "줄 해시 -> 토큰(form, tag, start, len) 목록"을
+SQLite 파일에 저장해 두고, 토큰화 전에 먼저 조회합니다.
+(매 학기 반복되는 강의 자료는 Kiwi 호출 없이 처리됩니다.)
+
+- 항목 키에 분석기 버전(kiwipiepy / 모델)을 포함하므로, 배포 중 이전 버전 Worker가 같은 파일에
+  저장한 결과를 새 버전 Worker가 읽지 않습니다. (이전 버전 항목은 사용되지 않으므로 먼저 지워집니다.)
+- 항목 수 / 파일 크기 상한을 넘으면 오래 사용하지 않은 항목부터 지우고 공간을 회수합니다.
+- 여러 Worker 프로세스가 같은 파일을 공유할 수 있도록 WAL 모드로 엽니다.
+- 저장소 오류는 마스킹을 멈추지 않으며, 그냥 Kiwi로 다시 분석합니다.
+- MASK_ANALYSIS_STORE_PATH 를 지정한 프로세스에서만 사용합니다.
+'''
+
+import hashlib
+import logging
+import marshal
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# 기본은 사용 안 함. 엔진을 import 하는 모든 프로세스(미리보기 API 를 쓰는 웹 포함)가 볼륨 밖에
+# 파일을 만들지 않도록, 볼륨을 붙인 Worker 컨테이너에서만 경로를 지정합니다. (docker-compose.yml)
+STORE_PATH = os.environ.get("MASK_ANALYSIS_STORE_PATH", "")
+MAX_ENTRIES = int(os.environ.get("MASK_ANALYSIS_STORE_MAX_ENTRIES", "1000000"))
+MAX_BYTES = int(os.environ.get("MASK_ANALYSIS_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+COMPACT_RATIO = 0.2        # 상한을 넘으면 오래 안 쓴 항목을 이 비율만큼 지움
+CHECK_EVERY_INSERTS = 2000  # 프로세스마다 이만큼 저장할 때마다 상한 확인
+MMAP_SIZE = 256 * 1024 * 1024
+QUERY_BATCH = 500          # SQLite 바인딩 변수 개수 제한 대비
+
+# Kiwi Token 대신 저장/복원하는 토큰 (SpanMatcher 가 쓰는 속성만 보관)
+AnalyzedToken = namedtuple("AnalyzedToken", "form tag start len")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS analysis (
+    key BLOB PRIMARY KEY,
+    tokens BLOB NOT NULL,
+    last_used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used);
+"""
+
+
+def _line_key(line, version):
+    h = hashlib.blake2b(version.encode("utf-8"), digest_size=16)
+    h.update(b"\0")
+    h.update(line.encode("utf-8"))
+    return h.digest()
+
+
+@contextmanager
+def _transaction(conn):
+    # isolation_level=None(autocommit) 연결이므로 여러 문장을 한 번에 커밋하려면 직접 묶습니다.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _now_hour():
+    # 사용 시각은 시간 단위로만 기록하여, 같은 시간 안의 반복 조회는 쓰기를 하지 않습니다.
+    return int(time.time() // 3600)
+
+
+class AnalysisStore:
+    """줄 텍스트 -> 분석 토큰 목록 저장소. 프로세스/스레드마다 별도 연결을 씁니다."""
+
+    def __init__(self, path, version, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._inserts = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._init_db()
+
+    def _conn(self):
+        # fork 된 자식 프로세스는 부모의 연결을 쓰면 안 되므로 pid 가 바뀌면 새로 엽니다.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            # auto_vacuum 은 새 파일에서 WAL 전환 / 테이블 생성보다 먼저 지정해야 적용됩니다.
+            # (이미 있는 파일에서는 다음 VACUUM 때 적용되며, compact_if_needed 가 처리합니다.)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        # 버전은 항목 키에 들어 있으므로 여기서는 기록만 합니다. (버전이 바뀌었다고 지우면
+        # 배포 중 아직 이전 버전으로 동작하는 Worker와 서로의 결과를 계속 지우게 됩니다.)
+        with _transaction(conn):
+            row = conn.execute("SELECT value FROM meta WHERE name='version'").fetchone()
+            if row is not None and row[0] != self.version:
+                logger.info(f"Analysis store version changed ({row[0]} -> {self.version})")
+            conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (self.version,))
+
+    def get_many(self, lines):
+        """저장된 줄만 line -> 토큰 튜플 딕셔너리로 반환합니다."""
+        keys = {_line_key(line, self.version): line for line in lines}
+        found, stale = {}, []
+        now = _now_hour()
+        try:
+            conn = self._conn()
+            key_list = list(keys)
+            for i in range(0, len(key_list), QUERY_BATCH):
+                batch = key_list[i:i + QUERY_BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT key, tokens, last_used FROM analysis WHERE key IN ({marks})", batch)
+                for key, blob, last_used in rows:
+                    found[keys[key]] = tuple(AnalyzedToken(*t) for t in marshal.loads(blob))
+                    if last_used < now:
+                        stale.append((now, key))
+            if stale:
+                with _transaction(conn):
+                    conn.executemany("UPDATE analysis SET last_used=? WHERE key=?", stale)
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis store read failed: {e}")
+        return found
+
+    def put_many(self, items):
+        """(line, 토큰 목록) 들을 저장합니다."""
+        now = _now_hour()
+        rows = [(_line_key(line, self.version), marshal.dumps(tuple(tuple(t) for t in tokens)), now) for line, tokens in items]
+        if not rows:
+            return
+        try:
+            with _transaction(self._conn()) as conn:
+                conn.executemany("INSERT OR IGNORE INTO analysis (key, tokens, last_used) VALUES (?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis store write failed: {e}")
+            return
+
+        self._inserts += len(rows)
+        if self._inserts >= CHECK_EVERY_INSERTS:
+            self._inserts = 0
+            self.compact_if_needed()
+
+    def _size_bytes(self, conn):
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - freelist) * page_size
+
+    def compact_if_needed(self):
+        """상한을 넘었으면 오래 사용하지 않은 항목부터 지우고 빈 페이지를 파일에서 회수합니다."""
+        try:
+            conn = self._conn()
+            count = conn.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+            size = self._size_bytes(conn)
+            if count <= self.max_entries and size <= self.max_bytes:
+                return
+            target = min(count, max(int(count * COMPACT_RATIO), count - self.max_entries))
+            with _transaction(conn):
+                conn.execute(
+                    "DELETE FROM analysis WHERE key IN (SELECT key FROM analysis ORDER BY last_used LIMIT ?)",
+                    (target,),
+                )
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                conn.execute("PRAGMA incremental_vacuum")
+            else:
+                # auto_vacuum 이 꺼진 채 만들어진 파일은 한 번 전체 VACUUM 해야 공간이 줄고 INCREMENTAL 로 바뀝니다.
+                conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info(f"Analysis store compacted: removed {target} of {count} entries ({size} bytes)")
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis store compaction failed: {e}")
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_analysis_store(version, path=None):
+    """설정된 경로의 저장소를 반환합니다. 사용하지 않거나 열 수 없으면 None."""
+    path = STORE_PATH if path is None else path
+    if not path:
+        return None
+    with _STORES_LOCK:
+        if (path, version) not in _STORES:
+            try:
+                _STORES[(path, version)] = AnalysisStore(path, version)
+            except (OSError, sqlite3.Error) as e:
+                # 한 번 실패하면 이 프로세스에서는 저장소 없이 동작합니다.
+                logger.warning(f"Analysis store disabled ({path}): {e}")
+                _STORES[(path, version)] = None
+        return _STORES[(path, version)]
@@ -1,20 +1,31 @@
 # engine/mask_engine.py
-import io, os, time, random
+import io, os, time, random, heapq
+from functools import lru_cache
 import fitz  # PyMuPDF
 
+import kiwipiepy
 from kiwipiepy import Kiwi
 
+from .analysis_store import AnalyzedToken, get_analysis_store
+
 DEFAULTS = {
     "mode": "redact",            # "redact" | "highlight"
     "target_mode": "both",       # "josa_only" | "nouns_only" | "both"
     "mask_ratio": 0.95,
+    "select_strategy": "ratio",  # "ratio" | "per_page" | "per_line" | "weighted"
+    "mask_count": 10,            # per_page 전략에서 페이지당 마스킹 개수
+    "seed": None,                # 지정하면 문서 단위로 재현 가능 (페이지별 시드는 seed:페이지번호)
     "min_mask_len": 2,
     "allow_noun_span": True,
     "stroke_color": (0, 0, 0),
     "stroke_width": 1.8,
     "highlight_color": (1, 0, 0),
     "line_width": 1.8,
+    "output_profile": "auto",    # "auto" | "fast" | "balanced" | "compact"
+    "from_page": 0,              # 처리할 첫 페이지 (0부터 시작)
+    "to_page": -1,               # 처리할 마지막 페이지 (포함, -1이면 끝까지)
     "nounish_include": {"SL", "SN"},
+    "mask_patterns": (),         # 추가로 마스킹할 품사 열. 예: ("SN+NNB", "NNG+XSN", "N*+XSV")
     "josa_set": {
         "은","는","이","가","을","를","에","에서","에게","께",
         "으로","로","으로서","로서","으로써","로써","에게서",
@@ -24,9 +35,47 @@ DEFAULTS = {
     }
 }
 
+# 저장 옵션 프로필: garbage=4 / clean 은 압축률은 좋지만 큰 문서에서는 저장 시간이 깁니다.
+OUTPUT_PROFILES = {
+    "fast":     {"garbage": 0, "deflate": True, "clean": False},
+    "balanced": {"garbage": 1, "deflate": True, "clean": False},
+    "compact":  {"garbage": 4, "deflate": True, "clean": True},
+}
+# auto 프로필: 처리한 페이지 수에 따라 선택
+AUTO_COMPACT_MAX_PAGES = 20
+AUTO_BALANCED_MAX_PAGES = 100
+PREVIEW_DPI = 72  # 미리보기 썸네일 해상도 (72 = 원래 크기)
+
 _KIWI = Kiwi(num_workers=-1)
 
-def _is_nounish_tag(tag: str, include): return tag.startswith("N") or tag in include
+class MaskCancelled(Exception):
+    """mask_pdf_bytes(should_cancel=...) 가 True 를 반환하여 처리를 중단했을 때 발생합니다."""
+
+def _analyzer_version():
+    try:
+        import kiwipiepy_model
+        model_version = kiwipiepy_model.__version__
+    except (ImportError, AttributeError):
+        model_version = "unknown"
+    return f"kiwipiepy={kiwipiepy.__version__};model={model_version}"
+
+# 분석 저장소 키: 분석기나 모델 버전이 바뀌면 저장된 결과를 쓰지 않습니다.
+ANALYZER_VERSION = _analyzer_version()
+
+# Kiwi 품사 태그 (불규칙 활용은 "VV-I" 처럼 접미사가 붙어 나오며, 처음 볼 때 분류해 둡니다)
+KIWI_TAGS = (
+    "NNG", "NNP", "NNB", "NR", "NP",
+    "VV", "VA", "VX", "VCP", "VCN", "MM", "MAG", "MAJ", "IC",
+    "JKS", "JKC", "JKG", "JKO", "JKB", "JKV", "JKQ", "JX", "JC",
+    "EP", "EF", "EC", "ETN", "ETM", "XPN", "XSN", "XSV", "XSA", "XSM", "XR",
+    "SF", "SP", "SS", "SSO", "SSC", "SE", "SO", "SW", "SL", "SH", "SN", "SB", "UN",
+    "W_URL", "W_EMAIL", "W_HASHTAG", "W_MENTION", "W_SERIAL", "W_EMOJI", "Z_CODA", "Z_SIWA",
+)
+
+# 태그 분류 비트 (사용자 패턴 원소는 그 다음 비트부터 차례로 배정)
+_NOUNISH = 1
+_JOSA_TAG = 2
+_FIRST_PATTERN_BIT = 4
 
 def _collect_line_chars(line):
     out = []
@@ -59,6 +108,52 @@ def _merge_rects(rects, x_gap=0.5, y_gap=0.12):
     merged.append(cur)
     return merged
 
+def _line_key(r):
+    return round((r.y0 + r.y1) / 2, 2)
+
+def _page_rng(seed, pno):
+    # 페이지마다 독립된 시드를 쓰므로 페이지 범위로 나눠 처리해도 결과가 같습니다.
+    return random.Random(f"{seed}:{pno}") if seed is not None else random.Random()
+
+def _select_rects(rects, strategy, mask_ratio, mask_count, rng):
+    """후보 목록을 한 번 훑으면서 정렬 키를 매기고, 키가 큰 k개를 고릅니다. (원래 순서 유지)"""
+    n = len(rects)
+    if n == 0: return rects
+    ratio = max(0.0, min(1.0, mask_ratio))
+    if strategy == "per_page":
+        k = max(0, min(int(mask_count), n))
+    else:
+        k = int(n * ratio)
+        # 기존 동작 유지: ratio 전략에서 k가 0이면 전체를 마스킹합니다.
+        if strategy == "ratio" and k == 0: return rects
+    if k >= n: return rects
+    if k <= 0: return []
+
+    keys, lines = [], {}
+    for i, r in enumerate(rects):
+        u = rng.random()
+        if strategy == "weighted":
+            # 가중 비복원 추출(Efraimidis-Spirakis): 긴 구간일수록 선택될 확률이 높음
+            keys.append(u ** (1.0 / max(r.width, 1e-6)))
+        else:
+            keys.append(u)
+        if strategy == "per_line":
+            lines.setdefault(_line_key(r), []).append(i)
+
+    if strategy == "per_line":
+        # 줄마다 비율대로 나누고, 남는 개수는 소수점 이하가 큰 줄부터 배분합니다. (최대 나머지 방식)
+        quotas = [(len(idx) * k / n, j, idx) for j, idx in enumerate(lines.values())]
+        counts = [int(q) for q, _, _ in quotas]
+        remain = k - sum(counts)
+        for _, j, _ in sorted(quotas, key=lambda x: (-(x[0] - int(x[0])), x[1]))[:remain]:
+            counts[j] += 1
+        chosen = set()
+        for (_, _, idx), c in zip(quotas, counts):
+            chosen.update(heapq.nlargest(c, idx, key=keys.__getitem__))
+    else:
+        chosen = set(heapq.nlargest(k, range(n), key=keys.__getitem__))
+    return [r for i, r in enumerate(rects) if i in chosen]
+
 def _dedup_spans(spans):
     if not spans: return []
     spans = sorted(spans)
@@ -68,99 +163,296 @@ def _dedup_spans(spans):
         else: out.append([s, e])
     return [tuple(x) for x in out]
 
-def _spans_before_josa(tokens, josa_set, allow_span, min_len, include):
-    spans = []
-    i = 0
-    while i < len(tokens):
-        form, tag = tokens[i].form, tokens[i].tag
-        is_josa = (form in josa_set) or tag.startswith("J")
-        if is_josa and i > 0:
-            j = i - 1
-            if allow_span:
-                while j >= 0 and _is_nounish_tag(tokens[j].tag, include): j -= 1
+class SpanMatcher:
+    """마스킹 설정을 한 번 컴파일해 두고, 토큰 목록을 한 번만 훑어 마스킹 구간을 찾습니다.
+
+    - 태그 문자열 -> 분류 비트(명사류 / 조사 / 사용자 패턴 원소)를 미리 계산한 표로 판별합니다.
+    - 조사 앞 명사 구간과 명사 연속 구간을 같은 순회에서 함께 만듭니다.
+    - mask_patterns 는 "SN+NNB" 처럼 +로 이은 태그 열이며, "N*" 같은 접두사도 쓸 수 있습니다.
+      패턴들은 트라이로 컴파일되어 각 위치에서 가장 긴 일치 구간을 마스킹합니다.
+    """
+
+    def __init__(self, target_mode, josa_set, allow_span, min_len, include, patterns=()):
+        self.want_josa = target_mode in ("both", "josa_only")
+        self.want_nouns = target_mode in ("both", "nouns_only")
+        self.josa_forms = frozenset(josa_set)
+        self.allow_span = allow_span
+        self.min_len = min_len
+        self.include = frozenset(include)
+
+        self._elements = {}   # 패턴 원소 -> 비트
+        self._trie = ({}, [False])  # (원소 비트 -> 자식 노드, [패턴 끝 여부])
+        for pattern in patterns:
+            self._add_pattern(pattern)
+        self._first_bits = 0
+        for bit in self._trie[0]: self._first_bits |= bit
+
+        self._tag_bits = {tag: self._classify(tag) for tag in KIWI_TAGS}
+
+    def _add_pattern(self, pattern):
+        parts = [p.strip() for p in pattern.split("+")]
+        if not all(parts):
+            raise ValueError(f"Invalid mask pattern: {pattern}")
+        node = self._trie
+        for part in parts:
+            if part.endswith("*"):
+                known = any(t.startswith(part[:-1]) for t in KIWI_TAGS)
+            else:
+                known = part in KIWI_TAGS
+            if not known:
+                raise ValueError(f"Unknown POS tag in mask pattern: {pattern}")
+            bit = self._elements.setdefault(part, _FIRST_PATTERN_BIT << len(self._elements))
+            node = node[0].setdefault(bit, ({}, [False]))
+        node[1][0] = True
+
+    def _classify(self, tag):
+        bits = 0
+        if tag.startswith("N") or tag in self.include: bits |= _NOUNISH
+        if tag.startswith("J"): bits |= _JOSA_TAG
+        base = tag.split("-", 1)[0]  # "VV-I" -> "VV"
+        for part, bit in self._elements.items():
+            if part.endswith("*"):
+                if base.startswith(part[:-1]): bits |= bit
+            elif part == tag or part == base:
+                bits |= bit
+        return bits
+
+    def _bits(self, tag):
+        bits = self._tag_bits.get(tag)
+        if bits is None:
+            bits = self._tag_bits[tag] = self._classify(tag)
+        return bits
+
+    def spans(self, tokens):
+        """토큰 목록 -> 겹치지 않게 합쳐진 (start, end) 문자 구간 목록."""
+        spans = []
+        emit = spans.append
+        min_len = self.min_len
+        want_josa, want_nouns, allow_span = self.want_josa, self.want_nouns, self.allow_span
+        josa_forms = self.josa_forms
+        masks = [self._bits(t.tag) for t in tokens]
+
+        run_start = -1  # 진행 중인 명사류 연속 구간의 첫 토큰 (-1: 없음)
+        for i, tok in enumerate(tokens):
+            bits = masks[i]
+            # 조사 앞 명사 구간: 바로 앞 토큰에서 끝나는 명사류 구간
+            if want_josa and i > 0 and run_start >= 0 and (bits & _JOSA_TAG or tok.form in josa_forms):
+                prev = tokens[i - 1]
+                s = tokens[run_start if allow_span else i - 1].start
+                e = prev.start + prev.len
+                if e - s >= min_len: emit((s, e))
+            if bits & _NOUNISH:
+                if run_start < 0: run_start = i
+            elif run_start >= 0:
+                if want_nouns: self._emit_run(tokens, run_start, i - 1, emit)
+                run_start = -1
+        if run_start >= 0 and want_nouns:
+            self._emit_run(tokens, run_start, len(tokens) - 1, emit)
+
+        if self._first_bits:
+            self._match_patterns(tokens, masks, emit)
+        return _dedup_spans(spans)
+
+    def _emit_run(self, tokens, first, last, emit):
+        s = tokens[first].start; e = tokens[last].start + tokens[last].len
+        if e - s >= self.min_len: emit((s, e))
+
+    def _match_patterns(self, tokens, masks, emit):
+        n = len(masks)
+        for i in range(n):
+            if not masks[i] & self._first_bits: continue
+            # 한 토큰이 여러 원소(예: "N*" 와 "NNG")에 맞을 수 있으므로 활성 노드 집합으로 따라갑니다.
+            nodes, j, last = [self._trie], i, -1
+            while nodes and j < n:
+                m = masks[j]
+                nodes = [child for node in nodes for bit, child in node[0].items() if m & bit]
+                if any(node[1][0] for node in nodes): last = j
                 j += 1
-            if j <= i-1 and _is_nounish_tag(tokens[i-1].tag, include):
-                s = tokens[j].start
-                e = tokens[i-1].start + tokens[i-1].len
-                if e - s >= min_len: spans.append((s, e))
-        i += 1
-    return spans
-
-def _spans_all_noun_runs(tokens, min_len, include):
-    spans, i, n = [], 0, len(tokens)
-    while i < n:
-        if _is_nounish_tag(tokens[i].tag, include):
-            j = i + 1
-            while j < n and _is_nounish_tag(tokens[j].tag, include): j += 1
-            s = tokens[i].start; e = tokens[j-1].start + tokens[j-1].len
-            if e - s >= min_len: spans.append((s, e))
-            i = j
-        else:
-            i += 1
-    return spans
+            if last >= 0:
+                self._emit_run(tokens, i, last, emit)
+
+@lru_cache(maxsize=32)
+def compile_span_matcher(target_mode, josa_set, allow_span, min_len, include, patterns=()):
+    """설정이 같으면 컴파일된 SpanMatcher 를 재사용합니다. (인자는 모두 hashable 이어야 함)"""
+    return SpanMatcher(target_mode, josa_set, allow_span, min_len, include, patterns)
+
+def _normalize_patterns(patterns):
+    if isinstance(patterns, str):
+        patterns = patterns.split(",")
+    return tuple(p.strip() for p in patterns if p and p.strip())
 
-def mask_pdf_bytes(pdf_bytes: bytes, **opts) -> bytes:
+def validate_mask_patterns(patterns):
+    """"SN+NNB,NNG+XSN" 같은 입력을 검사하여 패턴 목록으로 반환합니다. 잘못되면 ValueError."""
+    patterns = _normalize_patterns(patterns)
+    SpanMatcher("both", (), True, 1, (), patterns)
+    return list(patterns)
+
+def _analyze_lines(texts, counts=None):
+    """줄 텍스트 목록 -> 줄별 토큰 목록. 분석 저장소를 먼저 보고, 없는 줄만 Kiwi로 분석합니다."""
+    store = get_analysis_store(ANALYZER_VERSION)
+    found = store.get_many(texts) if store and texts else {}
+    misses = [t for t in dict.fromkeys(texts) if t not in found]
+    if misses:
+        analyzed = [
+            tuple(AnalyzedToken(tk.form, tk.tag, tk.start, tk.len) for tk in tokens)
+            for tokens in _KIWI.tokenize(misses)
+        ]
+        found.update(zip(misses, analyzed))
+        if store: store.put_many(zip(misses, analyzed))
+    if counts is not None:
+        counts["hits"] += len(texts) - len(misses)
+        counts["misses"] += len(misses)
+    return [found[t] for t in texts]
+
+def _draw_rects(page, rects, color, width, fill=None):
+    """사각형들을 Shape 하나에 모아 페이지당 한 번만 content stream 에 씁니다."""
+    if not rects: return
+    shape = page.new_shape()
+    for r in rects: shape.draw_rect(r)
+    shape.finish(color=color, fill=fill, width=width)
+    shape.commit(overlay=True)
+
+def _redact_rects(page, rects, stroke_color, stroke_w):
+    # 가릴 대상이 없으면 content stream 을 다시 쓰는 apply_redactions 자체를 건너뜁니다.
+    if not rects: return
+    # 주석은 apply_redactions 에서 바로 사라지므로 색 지정/update() 없이 글자 제거용으로만 씁니다.
+    for r in rects: page.add_redact_annot(r)
+    # 대상은 텍스트뿐이므로 이미지/벡터 그래픽은 건드리지 않습니다. (흰 채우기로 덮여 보이는 결과는 같음)
+    page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE, graphics=fitz.PDF_REDACT_LINE_ART_NONE)
+    _draw_rects(page, rects, stroke_color, stroke_w, fill=(1, 1, 1))
+
+def _compile_options(opts):
+    """옵션을 기본값과 합치고 검사한 뒤 (cfg, matcher) 를 반환합니다."""
     cfg = DEFAULTS.copy(); cfg.update(opts or {})
-    mode = cfg["mode"]; target_mode = cfg["target_mode"]
-    mask_ratio = float(cfg["mask_ratio"]); min_len = int(cfg["min_mask_len"])
-    allow_span = bool(cfg["allow_noun_span"])
-    stroke_color = tuple(cfg["stroke_color"]); stroke_w = float(cfg["stroke_width"])
-    hi_color = tuple(cfg["highlight_color"]); line_w = float(cfg["line_width"])
-    include = set(cfg["nounish_include"]); josa_set = set(cfg["josa_set"])
+    if cfg["select_strategy"] not in ("ratio", "per_page", "per_line", "weighted"):
+        raise ValueError(f"Unknown select_strategy: {cfg['select_strategy']}")
+    if cfg["output_profile"] != "auto" and cfg["output_profile"] not in OUTPUT_PROFILES:
+        raise ValueError(f"Unknown output_profile: {cfg['output_profile']}")
+    matcher = compile_span_matcher(
+        cfg["target_mode"], frozenset(cfg["josa_set"]), bool(cfg["allow_noun_span"]), int(cfg["min_mask_len"]),
+        frozenset(cfg["nounish_include"]), _normalize_patterns(cfg["mask_patterns"]),
+    )
+    return cfg, matcher
+
+def _page_mask_rects(page, pno, cfg, matcher, analysis_counts):
+    """페이지 텍스트에서 마스킹 후보를 찾아 선택 전략에 따라 고른 사각형 목록을 반환합니다."""
+    raw: dict = page.get_text("rawdict") # type: ignore 
+    lines = []
+    for block in raw.get("blocks", []):
+        if block.get("type") != 0: continue
+        for line in block.get("lines", []):
+            line_chars = _collect_line_chars(line)
+            if not line_chars: continue
+            line_text = "".join(ch["char"] for ch in line_chars)
+            if not line_text.strip(): continue
+            lines.append((line_chars, line_text))
+
+    # 페이지의 줄들을 한 번에 분석합니다. (저장소에 있는 줄은 Kiwi를 거치지 않음)
+    rects = []
+    analyzed = _analyze_lines([text for _, text in lines], analysis_counts)
+    for (line_chars, _), tokens in zip(lines, analyzed):
+        for s, e in matcher.spans(tokens):
+            r = _rect_from_char_range(line_chars, s, e)
+            if r: rects.append(r)
+
+    rects = _merge_rects(rects)
+    return _select_rects(
+        rects, cfg["select_strategy"], float(cfg["mask_ratio"]), int(cfg["mask_count"]), _page_rng(cfg["seed"], pno),
+    )
+
+def _apply_mask(page, rects, cfg):
+    if cfg["mode"] == "redact":
+        _redact_rects(page, rects, tuple(cfg["stroke_color"]), float(cfg["stroke_width"]))
+    else:  # highlight
+        _draw_rects(page, rects, tuple(cfg["highlight_color"]), float(cfg["line_width"]))
+
+def mask_pdf_bytes(pdf_bytes: bytes, stats=None, should_cancel=None, **opts) -> bytes:
+    """stats 에 dict 를 넘기면 처리 통계(pages, rects_per_page, seconds)를 채워 줍니다.
+    should_cancel 을 넘기면 페이지마다 호출하여 True 이면 MaskCancelled 를 발생시킵니다."""
+    t0 = time.perf_counter()
+    cfg, matcher = _compile_options(opts)
 
     src = fitz.open(stream=pdf_bytes, filetype="pdf")
     out = fitz.open()
 
-    for pno in range(len(src)):
+    from_page, to_page = _page_range(len(src), cfg["from_page"], cfg["to_page"])
+    rects_per_page = []
+    analysis_counts = {"hits": 0, "misses": 0}
+    for pno in range(from_page, to_page + 1):
+        if should_cancel is not None and should_cancel():
+            src.close(); out.close()
+            raise MaskCancelled(f"Cancelled before page {pno}")
         page = src.load_page(pno)
-        out.insert_pdf(src, from_page=pno, to_page=pno)
+        # final=False: 폰트/이미지 등 공유 객체를 한 번만 복사합니다.
+        # (페이지마다 새로 복사하면 garbage=4 없이는 결과 파일이 수 배로 커짐)
+        out.insert_pdf(src, from_page=pno, to_page=pno, final=False)
         marked = out[-1]
 
-        raw: dict = page.get_text("rawdict") # type: ignore 
-        # 👇 [디버깅용 로그 추가]
-        print(f"DEBUG: raw type is {type(raw)}") 
-        print(f"DEBUG: blocks count: {len(raw.get('blocks', []))}")
-        rects = []
-        for block in raw.get("blocks", []):
-            if block.get("type") != 0: continue
-            for line in block.get("lines", []):
-                line_chars = _collect_line_chars(line)
-                if not line_chars: continue
-                line_text = "".join(ch["char"] for ch in line_chars)
-                if not line_text.strip(): continue
-
-                tokens = _KIWI.tokenize(line_text)
-                spans = []
-                if target_mode in ("both", "josa_only"):
-                    spans += _spans_before_josa(tokens, josa_set, allow_span, min_len, include)
-                if target_mode in ("both", "nouns_only"):
-                    spans += _spans_all_noun_runs(tokens, min_len, include)
-                spans = _dedup_spans(spans)
-
-                for s, e in spans:
-                    r = _rect_from_char_range(line_chars, s, e)
-                    if r: rects.append(r)
-
-        rects = _merge_rects(rects)
-        if rects:
-            k = int(len(rects) * max(0.0, min(1.0, mask_ratio)))
-            k = max(0, min(k, len(rects)))
-            if 0 < k < len(rects): rects = random.sample(rects, k)
-
-        if mode == "redact":
-            for r in rects:
-                annot = marked.add_redact_annot(r, fill=(1, 1, 1))
-                try: annot.set_colors(stroke=stroke_color); annot.update()
-                except Exception: pass
-            marked.apply_redactions() # type: ignore 
-            for r in rects: marked.draw_rect(r, color=stroke_color, width=stroke_w, fill=None, overlay=True)# type: ignore 
-        else:  # highlight
-            for r in rects: marked.draw_rect(r, color=hi_color, width=line_w, fill=None, overlay=True)# type: ignore 
-
-        out.insert_pdf(src, from_page=pno, to_page=pno)
+        rects = _page_mask_rects(page, pno, cfg, matcher, analysis_counts)
+        rects_per_page.append(len(rects))
+        _apply_mask(marked, rects, cfg)
+
+        out.insert_pdf(src, from_page=pno, to_page=pno, final=False)
 
     src.close()
+    profile = _resolve_profile(cfg["output_profile"], len(rects_per_page))
+    t_save = time.perf_counter()
+    out_bytes = _save_to_bytes(out, profile)
+    if stats is not None:
+        stats.update(
+            pages=len(rects_per_page), rects_per_page=rects_per_page, seconds=time.perf_counter() - t0,
+            output_profile=profile, save_seconds=time.perf_counter() - t_save, output_bytes=len(out_bytes),
+            analysis_hits=analysis_counts["hits"], analysis_misses=analysis_counts["misses"],
+        )
+    return out_bytes
+
+def preview_pdf_pages(pdf_bytes: bytes, pages, dpi=PREVIEW_DPI, deadline=None, stats=None, **opts):
+    """선택한 페이지(0부터)만 mask_pdf_bytes 와 같은 방식으로 마스킹하여 PNG 로 렌더링합니다.
+    [{"page", "png", "rects"}] 를 반환하며, deadline(time.monotonic 기준)을 넘기면
+    첫 페이지 이후의 남은 페이지는 건너뜁니다. (stats["truncated"] 로 확인)"""
+    t0 = time.perf_counter()
+    cfg, matcher = _compile_options(opts)
+    analysis_counts = {"hits": 0, "misses": 0}
+    previews, truncated = [], False
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as src:
+        for pno in pages:
+            if previews and deadline is not None and time.monotonic() >= deadline:
+                truncated = True
+                break
+            # 저장하지 않으므로 원본 페이지에 바로 마스킹한 뒤 그립니다.
+            page = src.load_page(pno)
+            rects = _page_mask_rects(page, pno, cfg, matcher, analysis_counts)
+            _apply_mask(page, rects, cfg)
+            png = page.get_pixmap(dpi=dpi).tobytes("png")
+            previews.append({"page": pno, "png": png, "rects": len(rects)})
+    if stats is not None:
+        stats.update(
+            pages=len(previews), rects_per_page=[p["rects"] for p in previews], seconds=time.perf_counter() - t0,
+            truncated=truncated, analysis_hits=analysis_counts["hits"], analysis_misses=analysis_counts["misses"],
+        )
+    return previews
+
+def _page_range(page_count, from_page, to_page):
+    from_page = max(0, int(from_page))
+    to_page = page_count - 1 if to_page is None or int(to_page) < 0 else min(int(to_page), page_count - 1)
+    return from_page, to_page
+
+def _resolve_profile(profile, page_count):
+    if profile != "auto": return profile
+    if page_count <= AUTO_COMPACT_MAX_PAGES: return "compact"
+    if page_count <= AUTO_BALANCED_MAX_PAGES: return "balanced"
+    return "fast"
+
+def _save_to_bytes(doc, profile="compact") -> bytes:
     out_io = io.BytesIO()
-    out.save(out_io, garbage=4, deflate=True, clean=True)
-    out.close()
-    return out_io.getvalue()
\ No newline at end of file
+    doc.save(out_io, **OUTPUT_PROFILES[profile])
+    doc.close()
+    return out_io.getvalue()
+
+def merge_pdf_files(paths, output_profile="auto") -> bytes:
+    """페이지 범위별로 마스킹된 PDF 파일들을 순서대로 이어 붙입니다."""
+    out = fitz.open()
+    for path in paths:
+        with fitz.open(path) as part:
+            out.insert_pdf(part)
+    return _save_to_bytes(out, _resolve_profile(output_profile, len(out)))
\ No newline at end of file
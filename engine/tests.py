@@ -0,0 +1,278 @@
+'''마스킹 엔진 테스트 (engine/)'''
+
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+from unittest import TestCase, mock
+
+import fitz  # PyMuPDF
+
+from .analysis_store import AnalysisStore, AnalyzedToken
+from .mask_engine import (
+    DEFAULTS, KIWI_TAGS, _KIWI, _dedup_spans, _page_rng, _select_rects, SpanMatcher, mask_pdf_bytes,
+    validate_mask_patterns,
+)
+
+
+# =============================
+# 형태소 분석 저장소 (engine/analysis_store.py)
+# =============================
+
+def _tokens(line):
+    return [AnalyzedToken(line, "NNG", 0, len(line))]
+
+
+class AnalysisStoreTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.path = os.path.join(self.dir, "analysis.sqlite3")
+
+    def test_round_trip(self):
+        store = AnalysisStore(self.path, "v1")
+        store.put_many([("개념", _tokens("개념"))])
+        self.assertEqual(store.get_many(["개념", "없는 줄"]), {"개념": tuple(_tokens("개념"))})
+
+    def test_entries_of_other_versions_are_not_read(self):
+        # 배포 중에는 이전/새 버전 Worker가 같은 파일을 함께 씁니다.
+        new = AnalysisStore(self.path, "v2")
+        old = AnalysisStore(self.path, "v1")
+        old.put_many([("개념", _tokens("old"))])
+        self.assertEqual(new.get_many(["개념"]), {})
+        new.put_many([("개념", _tokens("new"))])
+        self.assertEqual(new.get_many(["개념"])["개념"][0].form, "new")
+        self.assertEqual(old.get_many(["개념"])["개념"][0].form, "old")
+
+    def test_new_file_uses_incremental_auto_vacuum(self):
+        AnalysisStore(self.path, "v1")
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+    def _fill(self, store, count=3000):
+        store.put_many((f"줄 {i} " + "가" * 200, _tokens(str(i))) for i in range(count))
+
+    def _compact(self, store):
+        store.max_entries = 100
+        store.compact_if_needed()
+        return os.path.getsize(self.path)
+
+    def test_compaction_shrinks_file(self):
+        store = AnalysisStore(self.path, "v1", max_entries=10 ** 9)
+        self._fill(store)
+        store._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        before = os.path.getsize(self.path)
+        self.assertLess(self._compact(store), before)
+
+    def test_compaction_shrinks_file_created_without_auto_vacuum(self):
+        # auto_vacuum 이 꺼진 채로 만들어진 기존 파일도 공간이 회수되어야 합니다.
+        with sqlite3.connect(self.path, isolation_level=None) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        store = AnalysisStore(self.path, "v1", max_entries=10 ** 9)
+        self._fill(store)
+        store._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        before = os.path.getsize(self.path)
+        self.assertLess(self._compact(store), before)
+        self.assertEqual(store._conn().execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+
+# =============================
+# 마스킹 구간 찾기 (SpanMatcher)
+# =============================
+
+# SpanMatcher 이전의 구현 (결과가 같아야 하는 기준)
+def _is_nounish_tag(tag, include): return tag.startswith("N") or tag in include
+
+def _spans_before_josa(tokens, josa_set, allow_span, min_len, include):
+    spans = []
+    for i in range(1, len(tokens)):
+        if not (tokens[i].form in josa_set or tokens[i].tag.startswith("J")): continue
+        j = i - 1
+        if allow_span:
+            while j >= 0 and _is_nounish_tag(tokens[j].tag, include): j -= 1
+            j += 1
+        if j <= i - 1 and _is_nounish_tag(tokens[i - 1].tag, include):
+            s = tokens[j].start; e = tokens[i - 1].start + tokens[i - 1].len
+            if e - s >= min_len: spans.append((s, e))
+    return spans
+
+def _spans_all_noun_runs(tokens, min_len, include):
+    spans, i, n = [], 0, len(tokens)
+    while i < n:
+        if _is_nounish_tag(tokens[i].tag, include):
+            j = i + 1
+            while j < n and _is_nounish_tag(tokens[j].tag, include): j += 1
+            s = tokens[i].start; e = tokens[j - 1].start + tokens[j - 1].len
+            if e - s >= min_len: spans.append((s, e))
+            i = j
+        else:
+            i += 1
+    return spans
+
+def _old_spans(tokens, target_mode, josa_set, allow_span, min_len, include):
+    spans = []
+    if target_mode in ("both", "josa_only"):
+        spans += _spans_before_josa(tokens, josa_set, allow_span, min_len, include)
+    if target_mode in ("both", "nouns_only"):
+        spans += _spans_all_noun_runs(tokens, min_len, include)
+    return _dedup_spans(spans)
+
+
+SENTENCES = [
+    "운영체제는 프로세스를 관리하고 메모리는 페이지 단위로 나뉜다.",
+    "TCP 3-way handshake 과정에서 SYN 패킷을 2번 보낸다.",
+    "데이터베이스 정규화의 목적은 이상 현상을 줄이는 것이다.",
+    "나는 학교에서 3개의 과목만 들었고 친구랑 도서관까지 갔다.",
+    "함수형 프로그래밍에서는 부수 효과가 없는 순수 함수를 선호한다.",
+]
+SETTINGS = [
+    (mode, allow_span, min_len)
+    for mode in ("both", "josa_only", "nouns_only") for allow_span in (True, False) for min_len in (1, 2, 3)
+]
+
+
+class SpanMatcherTests(TestCase):
+    def setUp(self):
+        self.josa = frozenset(DEFAULTS["josa_set"])
+        self.include = frozenset(DEFAULTS["nounish_include"])
+
+    def assert_same_as_old(self, tokens):
+        for mode, allow_span, min_len in SETTINGS:
+            matcher = SpanMatcher(mode, self.josa, allow_span, min_len, self.include)
+            with self.subTest(tokens=tokens, mode=mode, allow_span=allow_span, min_len=min_len):
+                self.assertEqual(
+                    matcher.spans(tokens), _old_spans(tokens, mode, self.josa, allow_span, min_len, self.include),
+                )
+
+    def test_same_as_old_extractor_on_kiwi_output(self):
+        for tokens in _KIWI.tokenize(SENTENCES):
+            self.assert_same_as_old(tokens)
+
+    def test_same_as_old_extractor_on_random_tokens(self):
+        # 조사 형태를 가진 명사("나" NP) 처럼 Kiwi 예문에 드문 경우까지 섞습니다.
+        rng = random.Random(0)
+        tags = ["NNG", "NNP", "NP", "SN", "SL", "JKS", "JX", "VV", "EC", "XSN", "SF"]
+        forms = ["가", "나", "도", "만", "학교", "3", "abc", "하"]
+        for _ in range(300):
+            tokens, pos = [], 0
+            for _ in range(rng.randint(0, 10)):
+                form = rng.choice(forms)
+                tokens.append(AnalyzedToken(form, rng.choice(tags), pos, len(form)))
+                pos += len(form) + rng.randint(0, 1)
+            self.assert_same_as_old(tokens)
+
+    def tokens(self, *pairs):
+        out, pos = [], 0
+        for form, tag in pairs:
+            out.append(AnalyzedToken(form, tag, pos, len(form)))
+            pos += len(form)
+        return out
+
+    def test_pattern_masks_longest_match(self):
+        tokens = self.tokens(("3", "SN"), ("개", "NNB"), ("씩", "XSN"), ("가", "VV"), ("다", "EF"))
+        matcher = SpanMatcher("nouns_only", (), True, 1, (), ("SN+NNB", "SN+NNB+XSN"))
+        # 명사 연속 구간(0, 2)과 더 긴 패턴 일치(0, 3)가 합쳐집니다.
+        self.assertEqual(matcher.spans(tokens), [(0, 3)])
+
+    def test_pattern_prefix_and_irregular_tags(self):
+        tokens = self.tokens(("공부", "NNG"), ("하", "XSV"), ("고", "EC"), ("걸", "VV-I"), ("어", "EC"))
+        matcher = SpanMatcher("josa_only", (), True, 1, (), ("N*+XSV", "VV"))
+        self.assertEqual(matcher.spans(tokens), [(0, 3), (4, 5)])
+
+    def test_patterns_apply_even_when_modes_are_off(self):
+        tokens = self.tokens(("학교", "NNG"), ("에", "JKB"), ("가", "VV"))
+        matcher = SpanMatcher("none", (), True, 1, (), ("JKB+VV",))
+        self.assertEqual(matcher.spans(tokens), [(2, 4)])
+
+    def test_validate_mask_patterns(self):
+        self.assertEqual(validate_mask_patterns(" SN+NNB , N*+XSV,,"), ["SN+NNB", "N*+XSV"])
+        for bad in ("SN+", "QQ", "SN+ZZ*"):
+            with self.subTest(pattern=bad), self.assertRaises(ValueError):
+                validate_mask_patterns(bad)
+        self.assertIn("NNB", KIWI_TAGS)
+
+
+# =============================
+# 마스킹 대상 선택 (_select_rects)
+# =============================
+
+def _rects(lines, per_line, width=lambda i: 10):
+    return [
+        fitz.Rect(i * 20, y * 20, i * 20 + width(i), y * 20 + 10)
+        for y in range(lines) for i in range(per_line)
+    ]
+
+
+class SelectRectsTests(TestCase):
+    def test_ratio_keeps_original_order(self):
+        rects = _rects(2, 10)
+        chosen = _select_rects(rects, "ratio", 0.5, 0, random.Random(1))
+        self.assertEqual(len(chosen), 10)
+        self.assertEqual(chosen, [r for r in rects if r in chosen])
+
+    def test_ratio_masks_everything_when_k_is_zero(self):
+        rects = _rects(1, 3)
+        self.assertEqual(_select_rects(rects, "ratio", 0.1, 0, random.Random(1)), rects)
+
+    def test_per_page_count(self):
+        rects = _rects(3, 5)
+        self.assertEqual(len(_select_rects(rects, "per_page", 0.0, 4, random.Random(1))), 4)
+        self.assertEqual(_select_rects(rects, "per_page", 0.0, 100, random.Random(1)), rects)
+        self.assertEqual(_select_rects(rects, "per_page", 0.0, 0, random.Random(1)), [])
+
+    def test_per_line_spreads_by_largest_remainder(self):
+        # 줄 길이 6, 3, 1 에서 5개 -> 3, 1.5, 0.5 -> 3, 2, 0 (동점이면 앞 줄)
+        rects = _rects(1, 6) + [r + (0, 20, 0, 20) for r in _rects(1, 3)] + [fitz.Rect(0, 40, 10, 50)]
+        chosen = _select_rects(rects, "per_line", 0.5, 0, random.Random(1))
+        per_line = [sum(1 for r in chosen if r.y0 == y) for y in (0, 20, 40)]
+        self.assertEqual(per_line, [3, 2, 0])
+
+    def test_weighted_prefers_wide_rects(self):
+        rects = _rects(1, 20, width=lambda i: 19 if i % 2 else 0.5)
+        wide = 0
+        for seed in range(50):
+            chosen = _select_rects(rects, "weighted", 0.5, 0, random.Random(seed))
+            self.assertEqual(len(chosen), 10)
+            wide += sum(1 for r in chosen if r.width > 1)
+        self.assertGreater(wide, 50 * 10 * 0.8)
+
+    def test_page_rng_is_per_page(self):
+        rects = _rects(4, 10)
+        pick = lambda seed, pno: _select_rects(rects, "ratio", 0.3, 0, _page_rng(seed, pno))
+        self.assertEqual(pick(7, 3), pick(7, 3))
+        self.assertNotEqual(pick(7, 3), pick(7, 4))
+        self.assertNotEqual(pick(7, 3), pick(8, 3))
+
+
+def _korean_pdf(pages):
+    doc = fitz.open()
+    for p in range(pages):
+        page = doc.new_page()
+        for i in range(8):
+            text = f"운영체제는 프로세스를 관리하고 메모리는 페이지 단위로 나뉜다 {p}{i}"
+            page.insert_text((50, 80 + i * 30), text, fontname="korea", fontsize=11)
+    return doc.tobytes()
+
+
+def _masked_rects(pdf_bytes, index):
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [
+            tuple(round(v, 2) for v in item[1])
+            for d in doc[index].get_drawings() for item in d["items"] if item[0] == "re"
+        ]
+
+
+@mock.patch("engine.mask_engine.get_analysis_store", return_value=None)
+class SeededMaskTests(TestCase):
+    def test_page_range_gives_same_result_as_whole_document(self, _):
+        # 대용량 문서를 페이지 범위로 나누어 처리해도 같은 seed 면 같은 결과여야 합니다.
+        data = _korean_pdf(3)
+        opts = dict(seed=42, mask_ratio=0.5, output_profile="fast")
+        whole = mask_pdf_bytes(data, **opts)
+        part = mask_pdf_bytes(data, from_page=2, to_page=2, **opts)
+        # 결과는 페이지마다 (마스킹, 원본) 두 장
+        self.assertTrue(_masked_rects(whole, 4))
+        self.assertEqual(_masked_rects(whole, 4), _masked_rects(part, 0))
+        self.assertNotEqual(_masked_rects(whole, 2), _masked_rects(whole, 4))
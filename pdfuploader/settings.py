@@ -69,6 +69,8 @@ TEMPLATES = [{
     ],},
 }]
 WSGI_APPLICATION = 'pdfuploader.wsgi.application'
+# 운영 환경은 ASGI(uvicorn 워커)로 실행합니다. (views.py의 async 뷰 사용)
+ASGI_APPLICATION = 'pdfuploader.asgi.application'
 
 # 프로젝트가 사용할 데이터베이스 설정
 DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3','NAME': BASE_DIR / 'db.sqlite3',}} # DB 경로
@@ -97,8 +99,9 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 
 # Celery Configuration
 # REDIS_HOST는 docker-compose.yml에 정의된 Redis 서비스 이름과 동일해야 합니다.
-REDIS_HOST = "redis_master" 
-REDIS_PORT = 6379
+# (부하 테스트 등 로컬 실행 시 REDIS_HOST / REDIS_PORT 환경 변수로 바꿀 수 있습니다.)
+REDIS_HOST = os.environ.get('REDIS_HOST', "redis_master")
+REDIS_PORT = int(os.environ.get('REDIS_PORT', '6379'))
 
 # Celery Broker URL (작업 메시지를 어디에 저장할 것인지)
 CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
@@ -110,6 +113,10 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Seoul' # 시간대 설정
+# Worker 없이 웹 프로세스 안에서 Task를 바로 실행 (부하 테스트 / 로컬 디버깅용)
+# 상태 조회 API가 Redis 결과를 읽으므로 eager 실행 결과도 결과 백엔드에 저장합니다.
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'false').lower() == 'true'
+CELERY_TASK_STORE_EAGER_RESULT = CELERY_TASK_ALWAYS_EAGER
 CELERY_IMPORTS = [
     'upload.tasks', 
     # 필요한 경우 다른 앱의 tasks 파일도 여기에 추가합니다.
@@ -117,4 +124,111 @@ CELERY_IMPORTS = [
 CELERY_BROKER_TRANSPORT_OPTIONS = {
     'visibility_timeout': 3600, # 작업 가시성 시간 (Worker가 Task를 가져간 후 다시 큐로 돌아오기까지의 시간)
     'broker_connection_retry_on_startup': True, # 시작 시 연결 오류 발생해도 재시도
-}
\ No newline at end of file
+    # Redis 브로커에서 Celery 우선순위(0~9, 0이 가장 높음)를 사용하기 위한 설정
+    'queue_order_strategy': 'priority',
+    'priority_steps': list(range(10)),
+    'sep': ':',
+}
+# Worker가 작업을 미리 많이 가져가 두면 우선순위가 무의미해지므로 하나씩만 가져갑니다.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# 웹 계층 공유 Redis 클라이언트 (upload/redis_client.py)
+# 상태 조회 API가 요청마다 새 연결을 만들지 않도록 커넥션 풀을 공유합니다.
+REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
+REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', '50'))
+
+# 종료 상태(SUCCESS/FAILURE) 캐시: 한 번 끝난 작업은 상태가 바뀌지 않으므로 잠시 프로세스 메모리에 보관
+STATUS_CACHE_TTL = float(os.environ.get('STATUS_CACHE_TTL', '30')) # 초 단위, 0이면 비활성화
+STATUS_CACHE_MAX_ENTRIES = 10000
+
+# 일괄 상태 조회 API에서 한 번에 받을 수 있는 최대 job_id 개수
+STATUS_BATCH_MAX_IDS = 100
+
+
+# 마스킹 작업 스케줄링 (upload/scheduling.py)
+# 페이지 수가 임계값을 넘는 문서는 mask_large 레인으로 보내 작은 작업이 뒤에 밀리지 않게 합니다.
+MASK_QUEUE_SMALL = 'mask_small'
+MASK_QUEUE_LARGE = 'mask_large'
+MASK_LARGE_PAGE_THRESHOLD = int(os.environ.get('MASK_LARGE_PAGE_THRESHOLD', '50'))
+# 레인 안의 크기 구간 (이 페이지 수를 넘을 때마다 우선순위가 2단계씩 낮아짐)
+MASK_PRIORITY_PAGE_STEPS = [10, 50, 200]
+# 같은 클라이언트의 진행 중 작업이 이 개수만큼 늘 때마다 우선순위를 1단계 낮춥니다.
+MASK_FAIR_SHARE_BATCH = 3
+MASK_INFLIGHT_TTL = 3600 # 이보다 오래된 진행 중 작업은 반납이 누락된 것으로 보고 지움 (visibility_timeout과 동일)
+# 클라이언트 IP 판별: 앞단에서 X-Forwarded-For 에 접속 IP를 덧붙이는 신뢰 프록시 수
+# (0이면 REMOTE_ADDR 사용, Cloud Run / 로드밸런서 뒤에서는 1 이상으로 지정)
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', '0'))
+
+# 대용량 문서 분할 처리: 이 페이지 수를 넘는 문서는 페이지 범위 Subtask로 나누어 처리 후 합칩니다.
+MASK_SPLIT_PAGE_THRESHOLD = int(os.environ.get('MASK_SPLIT_PAGE_THRESHOLD', '100'))
+MASK_SPLIT_CHUNK_PAGES = int(os.environ.get('MASK_SPLIT_CHUNK_PAGES', '25'))
+
+# 마스킹 미리보기 (views.mask_preview_api): Celery 를 거치지 않고 웹 프로세스에서 몇 페이지만 바로 마스킹
+MASK_PREVIEW_MAX_PAGES = int(os.environ.get('MASK_PREVIEW_MAX_PAGES', '3')) # 한 번에 미리볼 수 있는 최대 페이지 수
+MASK_PREVIEW_TIME_BUDGET = float(os.environ.get('MASK_PREVIEW_TIME_BUDGET', '2.0')) # 넘으면 남은 페이지는 건너뜀 (초)
+MASK_PREVIEW_TIMEOUT = float(os.environ.get('MASK_PREVIEW_TIMEOUT', '5.0')) # 첫 페이지도 이 안에 못 끝내면 504 (초)
+MASK_PREVIEW_MAX_CONCURRENCY = int(os.environ.get('MASK_PREVIEW_MAX_CONCURRENCY', '2')) # 웹 프로세스당 동시 미리보기 수
+MASK_PREVIEW_DPI = int(os.environ.get('MASK_PREVIEW_DPI', '72')) # 썸네일 해상도 (최대 150)
+
+# 모니터링 (upload/metrics.py)
+# Worker 작업 폴더 (tasks.py 의 CELERY_JOB_DIR 과 동일)
+JOB_DIR = "/tmp/celery_jobs"
+# 큐 길이 메트릭을 수집할 Celery 큐 목록
+WORKER_QUEUE_NAMES = ['celery', MASK_QUEUE_SMALL, MASK_QUEUE_LARGE]
+# Worker 메트릭 HTTP 서버 포트 (0이면 비활성화)
+METRICS_WORKER_PORT = int(os.environ.get('METRICS_WORKER_PORT', '9808'))
+
+# Readiness 체크 (upload/health.py)
+HEALTH_CACHE_TTL = 5 # 전체 readiness 결과 캐시 시간 (초)
+HEALTH_WORKER_CACHE_TTL = 15 # Celery inspect 결과 캐시 시간 (초, 브로드캐스트라 비용이 큼)
+HEALTH_INSPECT_TIMEOUT = 1.0 # Worker 응답 대기 시간 (초)
+HEALTH_MIN_FREE_BYTES = int(os.environ.get('HEALTH_MIN_FREE_BYTES', str(512 * 1024 * 1024))) # 작업 폴더 최소 여유 공간
+
+# Blob 저장소 (upload/storage.py): 업로드/결과 파일을 내용 해시로 중복 없이 저장
+# 'local' = 공유 볼륨 폴더, 's3' = S3 호환 저장소 (boto3 필요, 로컬 테스트는 MinIO)
+BLOB_STORAGE_BACKEND = os.environ.get('BLOB_STORAGE_BACKEND', 'local')
+BLOB_LOCAL_ROOT = os.environ.get('BLOB_LOCAL_ROOT', '/tmp/celery_blobs')
+BLOB_S3_BUCKET = os.environ.get('BLOB_S3_BUCKET', 'pdfmask-blobs')
+BLOB_S3_PREFIX = os.environ.get('BLOB_S3_PREFIX', 'blobs/')
+BLOB_S3_ENDPOINT_URL = os.environ.get('BLOB_S3_ENDPOINT_URL') # 예: http://minio:9000
+
+# 작업 시간 제한 (초, upload/tasks.py)
+# soft 제한을 넘으면 Task 안에서 SoftTimeLimitExceeded 가 발생하여 정리 후 실패 처리되고,
+# hard 제한(soft + TASK_HARD_TIME_LIMIT_GRACE)을 넘으면 Worker 자식 프로세스가 강제 종료됩니다. (prefork pool 기준)
+TASK_SOFT_TIME_LIMITS = {
+    'convert': int(os.environ.get('CONVERT_SOFT_TIME_LIMIT', '240')),
+    'mask_fast': int(os.environ.get('MASK_FAST_SOFT_TIME_LIMIT', '600')),
+    'mask_range': int(os.environ.get('MASK_RANGE_SOFT_TIME_LIMIT', '300')),
+    'mask_reduce': int(os.environ.get('MASK_REDUCE_SOFT_TIME_LIMIT', '300')),
+    'mask_ai': int(os.environ.get('MASK_AI_SOFT_TIME_LIMIT', '900')),
+}
+TASK_HARD_TIME_LIMIT_GRACE = 30
+# LibreOffice 변환 제한 시간 (넘으면 soffice 프로세스 그룹 전체를 종료)
+LIBREOFFICE_TIMEOUT = int(os.environ.get('LIBREOFFICE_TIMEOUT', '180'))
+
+# 작업 취소 (upload/cancellation.py)
+JOB_CANCEL_TTL = 3600 # 취소 요청 플래그 유지 시간 (visibility_timeout과 동일)
+JOB_CANCEL_CHECK_INTERVAL = 1.0 # Worker가 취소 요청을 확인하는 최소 간격 (초)
+
+# 제출 시점 승인 제어 (upload/admission.py)
+# 큐 길이 / 예상 대기 시간이 상한을 넘으면 503, 클라이언트별 제한을 넘으면 429 + Retry-After 로 거절합니다.
+ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+# 레인별 상한 (작업량 단위: 변환은 입력 MB, 마스킹은 페이지 수)
+ADMISSION_LANES = {
+    'convert': {
+        'queues': ['celery'],
+        'max_queue_depth': int(os.environ.get('ADMISSION_CONVERT_MAX_QUEUE', '100')),
+        'max_wait_seconds': int(os.environ.get('ADMISSION_CONVERT_MAX_WAIT', '600')),
+    },
+    'mask': {
+        'queues': [MASK_QUEUE_SMALL, MASK_QUEUE_LARGE],
+        'max_queue_depth': int(os.environ.get('ADMISSION_MASK_MAX_QUEUE', '300')),
+        'max_wait_seconds': int(os.environ.get('ADMISSION_MASK_MAX_WAIT', '900')),
+    },
+}
+ADMISSION_CLIENT_RATE_LIMIT = int(os.environ.get('ADMISSION_CLIENT_RATE_LIMIT', '30')) # 윈도당 제출 수 (0이면 제한 없음)
+ADMISSION_CLIENT_RATE_WINDOW = 60 # 초
+ADMISSION_CLIENT_MAX_INFLIGHT = int(os.environ.get('ADMISSION_CLIENT_MAX_INFLIGHT', '10')) # 클라이언트별 동시 진행 작업 수 (0이면 제한 없음)
+ADMISSION_THROUGHPUT_WINDOW_MINUTES = 5 # 처리량 측정 구간 (분)
+ADMISSION_DEFAULT_RETRY_AFTER = 30 # 처리량을 아직 모를 때의 Retry-After (초)
+ADMISSION_MAX_RETRY_AFTER = 600
@@ -0,0 +1,220 @@
+'''제출 시점 승인 제어 (admission control / backpressure).
+
+Worker가 밀릴 때 큐에 작업을 무한정 쌓아 모두가 오래 기다리게 하는 대신,
+apply_async 전에 받을 수 있는 작업인지 판단하여 일찍 거절합니다.
+- 클라이언트별 요청 속도(고정 윈도) / 동시 진행 작업 수 초과 -> 429
+- 레인의 큐 길이 또는 예상 대기 시간 초과 -> 503
+두 경우 모두 Retry-After 로 다시 시도할 시점을 알려 줍니다.
+
+예상 대기 시간은 "대기 중인 작업량 / 최근 처리량"으로 계산합니다.
+- 작업량 단위: 마스킹은 페이지 수, 변환은 입력 파일 크기(MB)
+- 처리량: Worker가 작업을 끝낼 때마다 분 단위 버킷에 처리한 작업량을 기록하고,
+  최근 ADMISSION_THROUGHPUT_WINDOW_MINUTES 분의 합으로 초당 처리량을 구합니다.
+- 대기 작업량: 큐의 작업 수 x 작업당 평균 작업량. 단, 대용량 문서를 나눈 범위 Subtask 는
+  작업 하나가 아니므로 따로 세어 둔 개수만큼 빼고, 대신 남은 페이지 수를 더합니다.
+
+요청 속도 카운터와 평균 작업량은 먼저 읽기만 하고, 승인된 요청만 반영합니다.
+(거절된 재시도가 카운터를 올려 계속 거절되거나, 받지 않은 작업이 평균을 바꾸지 않도록)
+'''
+
+import logging
+import math
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from .metrics import ADMISSION_REJECTIONS, priority_queue_keys
+from .scheduling import aacquire_client_slot, arelease_client_slot
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY = "admission:rate:{client_id}:{window}"
+AVG_UNITS_KEY = "admission:avg_units:{lane}"
+DONE_KEY = "admission:done:{lane}:{minute}"
+# 큐에 들어가 아직 시작하지 않은 Subtask (HASH: count, units)
+SUBTASK_BACKLOG_KEY = "admission:subtasks:{lane}"
+# Worker가 죽어 카운터가 어긋나도 한동안 Subtask 가 없으면 초기화되도록 합니다.
+SUBTASK_BACKLOG_TTL = 3600
+
+# 평균 작업량(EWMA) 갱신 비율
+AVG_UNITS_ALPHA = 0.2
+
+# admitted=False 이면 status(429/503), retry_after(초), reason 으로 거절 응답을 만듭니다.
+Admission = namedtuple("Admission", "admitted status retry_after reason client_inflight")
+
+
+def file_size_units(size_bytes):
+    """변환 작업량 단위 (MB, 최소 1)."""
+    return max(1.0, (size_bytes or 0) / (1024 * 1024))
+
+
+def _clamp_retry_after(seconds):
+    return int(min(settings.ADMISSION_MAX_RETRY_AFTER, max(1, math.ceil(seconds))))
+
+
+def _reject(lane, status, retry_after, reason):
+    retry_after = _clamp_retry_after(retry_after)
+    ADMISSION_REJECTIONS.labels(lane=lane, status=str(status)).inc()
+    logger.warning(f"Admission rejected ({lane}, {status}): {reason}, retry after {retry_after}s")
+    return Admission(False, status, retry_after, reason, None)
+
+
+# =============================
+# 처리량 / 대기 작업량 (Redis)
+# =============================
+
+async def aget_throughput(redis, lane):
+    """최근 처리량 (작업량 단위/초). 기록이 없으면 None."""
+    window = settings.ADMISSION_THROUGHPUT_WINDOW_MINUTES
+    now = time.time()
+    minute = int(now // 60)
+    keys = [DONE_KEY.format(lane=lane, minute=m) for m in range(minute - window + 1, minute + 1)]
+    done = sum(float(v) for v in await redis.mget(keys) if v is not None)
+    if done <= 0:
+        return None
+    # 현재 분은 지난 만큼만 계산합니다.
+    elapsed = (window - 1) * 60 + (now - minute * 60)
+    return done / max(elapsed, 1.0)
+
+
+def record_completed_work(redis, lane, units):
+    """(Worker) 끝난 작업량을 현재 분 버킷에 기록합니다. 실패해도 작업에는 영향이 없습니다."""
+    if not units:
+        return
+    key = DONE_KEY.format(lane=lane, minute=int(time.time() // 60))
+    try:
+        pipe = redis.pipeline()
+        pipe.incrbyfloat(key, units)
+        pipe.expire(key, (settings.ADMISSION_THROUGHPUT_WINDOW_MINUTES + 1) * 60)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record throughput for {lane}: {e}")
+
+
+def record_subtasks_queued(redis, lane, count, units):
+    """(Worker) 작업을 Subtask 로 나누어 큐에 넣을 때, 그 개수와 작업량을 기록합니다."""
+    key = SUBTASK_BACKLOG_KEY.format(lane=lane)
+    try:
+        pipe = redis.pipeline()
+        pipe.hincrby(key, "count", count)
+        pipe.hincrbyfloat(key, "units", units)
+        pipe.expire(key, SUBTASK_BACKLOG_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record queued subtasks for {lane}: {e}")
+
+
+def record_subtask_started(redis, lane, units):
+    """(Worker) Subtask 가 큐에서 나와 시작될 때 기록을 되돌립니다."""
+    key = SUBTASK_BACKLOG_KEY.format(lane=lane)
+    try:
+        pipe = redis.pipeline()
+        pipe.hincrby(key, "count", -1)
+        pipe.hincrbyfloat(key, "units", -units)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record started subtask for {lane}: {e}")
+
+
+async def _aqueue_depth(redis, lane, queues):
+    """(대기 중인 작업 수, 대기 중인 Subtask 작업량). 큐 길이에서 Subtask 는 작업 수로 세지 않습니다."""
+    pipe = redis.pipeline(transaction=False)
+    for queue in queues:
+        for key in priority_queue_keys(queue):
+            pipe.llen(key)
+    pipe.hmget(SUBTASK_BACKLOG_KEY.format(lane=lane), "count", "units")
+    *lengths, (sub_count, sub_units) = await pipe.execute()
+    sub_count = max(0, int(sub_count or 0))
+    sub_units = max(0.0, float(sub_units or 0))
+    return max(0, sum(lengths) - sub_count), sub_units
+
+
+async def _aavg_units(redis, lane, default):
+    """레인의 작업당 평균 작업량 (EWMA). 기록이 없으면 default."""
+    current = await redis.get(AVG_UNITS_KEY.format(lane=lane))
+    return float(current) if current is not None else default
+
+
+# =============================
+# 승인 판단
+# =============================
+
+def _rate_key(client_id, now):
+    return RATE_KEY.format(client_id=client_id, window=int(now // settings.ADMISSION_CLIENT_RATE_WINDOW))
+
+
+async def _acheck_client_rate(redis, client_id):
+    limit = settings.ADMISSION_CLIENT_RATE_LIMIT
+    if not limit:
+        return None
+    window = settings.ADMISSION_CLIENT_RATE_WINDOW
+    now = time.time()
+    count = await redis.get(_rate_key(client_id, now))
+    if int(count or 0) >= limit:
+        return window - (now % window), f"Too many requests: more than {limit} jobs per {window}s"
+    return None
+
+
+async def _acheck_backlog(redis, lane, job_units):
+    config = settings.ADMISSION_LANES[lane]
+    queued, subtask_units = await _aqueue_depth(redis, lane, config["queues"])
+    avg_units = await _aavg_units(redis, lane, job_units)
+    throughput = await aget_throughput(redis, lane)
+
+    if queued >= config["max_queue_depth"]:
+        excess = (queued - config["max_queue_depth"] + 1) * avg_units
+        retry_after = excess / throughput if throughput else settings.ADMISSION_DEFAULT_RETRY_AFTER
+        return retry_after, f"Server busy: {queued} jobs waiting"
+
+    if throughput:
+        # 처리량을 아직 모르면(기동 직후) 큐 길이 상한만 적용합니다.
+        wait = (queued * avg_units + subtask_units + job_units) / throughput
+        if wait > config["max_wait_seconds"]:
+            return wait - config["max_wait_seconds"], f"Server busy: estimated wait {int(wait)}s"
+    return None
+
+
+async def _arecord_admitted(redis, lane, job_units, client_id):
+    """승인된 작업만 요청 속도 카운터와 평균 작업량에 반영합니다."""
+    avg_key = AVG_UNITS_KEY.format(lane=lane)
+    current = await redis.get(avg_key)
+    avg = float(current) if current is not None else job_units
+    pipe = redis.pipeline()
+    # 여러 웹 프로세스가 동시에 갱신하면 한쪽 값이 덮일 수 있지만 추정치라 문제없습니다.
+    pipe.set(avg_key, avg + AVG_UNITS_ALPHA * (job_units - avg))
+    if settings.ADMISSION_CLIENT_RATE_LIMIT:
+        # 읽은 뒤 늘리므로 동시에 들어온 요청이 상한을 조금 넘을 수 있지만, 거절된 요청은 세지 않습니다.
+        rate_key = _rate_key(client_id, time.time())
+        pipe.incr(rate_key)
+        pipe.expire(rate_key, settings.ADMISSION_CLIENT_RATE_WINDOW)
+    await pipe.execute()
+
+
+async def aadmit_job(redis, lane, job_units, client_id, job_id):
+    """작업을 받을지 판단합니다. 승인되면 job_id 를 클라이언트의 진행 중 작업에 추가합니다.
+
+    승인 결과의 client_inflight 는 늘리기 전의 진행 중 작업 수이며(공정 분배용),
+    승인 후 큐 제출에 실패하면 호출한 쪽에서 arelease_client_slot 으로 되돌려야 합니다.
+    """
+    if settings.ADMISSION_ENABLED:
+        limited = await _acheck_client_rate(redis, client_id)
+        if limited:
+            return _reject(lane, 429, *limited)
+        busy = await _acheck_backlog(redis, lane, job_units)
+        if busy:
+            return _reject(lane, 503, *busy)
+
+    client_inflight = await aacquire_client_slot(redis, client_id, job_id)
+    max_inflight = settings.ADMISSION_CLIENT_MAX_INFLIGHT
+    if settings.ADMISSION_ENABLED and max_inflight and client_inflight >= max_inflight:
+        await arelease_client_slot(redis, client_id, job_id)
+        # 진행 중인 작업 하나가 끝날 시간 정도를 기다리게 합니다.
+        throughput = await aget_throughput(redis, lane)
+        avg = await redis.get(AVG_UNITS_KEY.format(lane=lane))
+        retry_after = float(avg) / throughput if throughput and avg else settings.ADMISSION_DEFAULT_RETRY_AFTER
+        return _reject(lane, 429, retry_after, f"Too many concurrent jobs: {client_inflight} in progress")
+
+    if settings.ADMISSION_ENABLED:
+        await _arecord_admitted(redis, lane, job_units, client_id)
+    return Admission(True, 202, None, None, client_inflight)
@@ -1,7 +1,22 @@
 '''앱의 구성 정보를 정의하는 파일. '''
 
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 class UploadConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'upload'
+
+    def ready(self):
+        # 프록시 뒤인데 TRUSTED_PROXY_COUNT 를 지정하지 않으면 모든 요청이 같은 클라이언트로 묶여,
+        # 클라이언트별 제한이 사이트 전체 제한처럼 동작합니다.
+        client_limits = settings.ADMISSION_CLIENT_RATE_LIMIT or settings.ADMISSION_CLIENT_MAX_INFLIGHT
+        if settings.ADMISSION_ENABLED and client_limits and not settings.TRUSTED_PROXY_COUNT:
+            logger.warning(
+                "TRUSTED_PROXY_COUNT is 0: clients are identified by REMOTE_ADDR. "
+                "Behind a reverse proxy, set it so per-client limits do not apply to all users at once."
+            )
@@ -0,0 +1,49 @@
+'''작업 취소 (사용자가 탭을 닫았거나 취소 버튼을 눌렀을 때).
+
+웹은 Redis에 "취소 요청" 플래그만 남기고, Worker는 Task 시작 시점 / 페이지 사이 /
+LibreOffice 실행 중에 플래그를 확인하여 스스로 정리하고 멈춥니다. (협력적 취소)
+Celery revoke 는 쓰지 않습니다. 큐에서 버려진 Task는 finally 블록이 실행되지 않아
+클라이언트 진행 중 작업 수와 입력 Blob 참조가 반납되지 않기 때문입니다.
+'''
+
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CANCEL_KEY = "job:cancel:{job_id}"
+
+
+class JobCancelled(Exception):
+    """취소 요청을 확인한 Task가 작업을 중단할 때 사용합니다."""
+
+
+async def arequest_cancel(redis, job_id):
+    """(웹) 작업 취소를 요청합니다. 플래그는 작업이 끝날 시간(JOB_CANCEL_TTL)이 지나면 사라집니다."""
+    await redis.set(CANCEL_KEY.format(job_id=job_id), 1, ex=settings.JOB_CANCEL_TTL)
+
+
+def is_cancel_requested(redis, job_id):
+    """(Worker) 취소 요청 여부. Redis 오류가 나면 취소되지 않은 것으로 봅니다."""
+    try:
+        return bool(redis.exists(CANCEL_KEY.format(job_id=job_id)))
+    except Exception as e:
+        logger.warning(f"Cancel flag check failed for {job_id}: {e}")
+        return False
+
+
+def make_cancel_checker(redis, job_id, interval=None):
+    """페이지마다 불러도 되도록 Redis 조회를 interval 초에 한 번으로 줄인 확인 함수를 만듭니다."""
+    interval = settings.JOB_CANCEL_CHECK_INTERVAL if interval is None else interval
+    state = {"checked_at": float("-inf"), "cancelled": False}
+
+    def should_cancel():
+        now = time.monotonic()
+        if not state["cancelled"] and now - state["checked_at"] >= interval:
+            state["checked_at"] = now
+            state["cancelled"] = is_cancel_requested(redis, job_id)
+        return state["cancelled"]
+
+    return should_cancel
@@ -0,0 +1,134 @@
+'''Readiness 체크 (로드밸런서 / 오케스트레이터용).
+
+liveness(/health/)는 프로세스가 살아 있는지만 보고,
+readiness(/health/ready/)는 이 인스턴스가 실제로 작업을 받을 수 있는지 확인합니다.
+- Redis 브로커 연결
+- 큐마다 이를 처리하는 Worker가 최소 1개 있는지 (Celery inspect)
+- 작업 폴더(/tmp/celery_jobs)와 로컬 Blob 저장소(BLOB_LOCAL_ROOT) 남은 공간
+- 변환 백엔드(LibreOffice) 실행 파일
+
+probe 부하를 줄이기 위해 결과는 몇 초간 캐시하며,
+비용이 큰 inspect(브로드캐스트) 결과는 더 길게 캐시합니다.
+'''
+
+import logging
+import shutil
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+from pdfuploader.celery import app
+
+logger = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+_READINESS_CACHE = {"expires_at": 0.0, "result": None}
+_WORKER_CACHE = {"expires_at": 0.0, "queues": None}
+_REDIS_CLIENT = None
+
+
+def _redis():
+    global _REDIS_CLIENT
+    if _REDIS_CLIENT is None:
+        _REDIS_CLIENT = redis.Redis.from_url(
+            settings.CELERY_BROKER_URL,
+            socket_connect_timeout=settings.CELERY_BROKER_CONNECTION_TIMEOUT,
+            socket_timeout=settings.CELERY_BROKER_CONNECTION_TIMEOUT,
+        )
+    return _REDIS_CLIENT
+
+
+# =============================
+# 개별 체크: (ok, detail) 반환
+# =============================
+
+def check_broker():
+    try:
+        _redis().ping()
+        return True, "ok"
+    except Exception as e:
+        return False, f"Redis unreachable: {e}"
+
+
+def _consumed_queues():
+    """살아 있는 Worker들이 소비 중인 큐 이름 집합 (캐시)."""
+    now = time.monotonic()
+    if _WORKER_CACHE["queues"] is not None and _WORKER_CACHE["expires_at"] > now:
+        return _WORKER_CACHE["queues"]
+
+    replies = app.control.inspect(timeout=settings.HEALTH_INSPECT_TIMEOUT).active_queues() or {}
+    queues = {q["name"] for worker_queues in replies.values() for q in worker_queues or []}
+    _WORKER_CACHE.update(expires_at=now + settings.HEALTH_WORKER_CACHE_TTL, queues=queues)
+    return queues
+
+
+def check_workers():
+    try:
+        queues = _consumed_queues()
+    except Exception as e:
+        return False, f"Worker inspect failed: {e}"
+    missing = [q for q in settings.WORKER_QUEUE_NAMES if q not in queues]
+    if missing:
+        return False, f"No live worker for queues: {', '.join(missing)}"
+    return True, "ok"
+
+
+def _disk_paths():
+    # 업로드/결과는 Blob 저장소에 쌓이므로, local 백엔드면 그 볼륨도 함께 확인합니다.
+    paths = [settings.JOB_DIR]
+    if settings.BLOB_STORAGE_BACKEND != "s3":
+        paths.append(settings.BLOB_LOCAL_ROOT)
+    return paths
+
+
+def check_disk():
+    details = []
+    for path in _disk_paths():
+        try:
+            free = shutil.disk_usage(path).free
+        except FileNotFoundError:
+            return False, f"{path} does not exist"
+        if free < settings.HEALTH_MIN_FREE_BYTES:
+            return False, f"Low disk space on {path}: {free} bytes free"
+        details.append(f"{path}: {free} bytes free")
+    return True, ", ".join(details)
+
+
+def check_converter():
+    path = shutil.which("soffice")
+    if not path:
+        return False, "soffice not found"
+    return True, path
+
+
+CHECKS = {
+    "broker": check_broker,
+    "workers": check_workers,
+    "disk": check_disk,
+    "converter": check_converter,
+}
+
+
+def check_readiness():
+    """(ready, checks) 를 반환합니다. 결과는 HEALTH_CACHE_TTL 초 동안 재사용됩니다."""
+    with _LOCK:
+        now = time.monotonic()
+        if _READINESS_CACHE["result"] is not None and _READINESS_CACHE["expires_at"] > now:
+            return _READINESS_CACHE["result"]
+
+        checks = {}
+        for name, check in CHECKS.items():
+            # 브로커가 끊겼으면 inspect 는 타임아웃까지 기다리기만 하므로 생략합니다.
+            if name == "workers" and not checks["broker"]["ok"]:
+                checks[name] = {"ok": False, "detail": "skipped (broker unreachable)"}
+                continue
+            ok, detail = check()
+            checks[name] = {"ok": ok, "detail": detail}
+            if not ok:
+                logger.warning(f"Readiness check '{name}' failed: {detail}")
+
+        result = (all(c["ok"] for c in checks.values()), checks)
+        _READINESS_CACHE.update(expires_at=time.monotonic() + settings.HEALTH_CACHE_TTL, result=result)
+        return result
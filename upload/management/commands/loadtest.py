@@ -0,0 +1,443 @@
+'''부하 테스트: 실제 HTTP API 로 작업을 흘려 보내고 지연 시간과 오류율을 보고합니다.
+
+/api/mask/, /convert/ppt_to_pdf/, /convert/docx_to_pdf/ 로 업로드한 뒤
+/api/status/<id>/?timing=1 로 완료를 기다리고 /api/download/<id>/ 로 결과를 받습니다.
+- 도착 간격은 지수 분포(포아송 도착)로, --rate 는 초당 평균 제출 수입니다.
+- 문서 종류 비율은 --mix 로, 종류별 입력 파일은 --file 로 지정합니다.
+- 보고: 종단 간 지연 p50/p90/p95/p99, 큐 대기 vs 처리 시간, 거절(429/503) / 실패 / 시간 초과 비율
+  (페이지 범위로 나뉜 대용량 문서는 "<종류>:split" 으로 따로 집계하고, 범위 Subtask 대기 시간을 함께 보고)
+
+--local 을 주면 외부 서비스 없이 이 머신에서 redis-server, uvicorn 웹 서버,
+Celery Worker(--eager 이면 Worker 없이 웹 프로세스 안에서 실행)를 직접 띄우고 끝나면 정리합니다.
+
+예)
+  python manage.py loadtest --local --rate 2 --duration 60
+  python manage.py loadtest --local --mix mask=0.8,ppt=0.2 --file ppt=samples/lecture.pptx
+  python manage.py loadtest --base-url http://127.0.0.1:8000 --rate 5 --duration 300 --json report.json
+'''
+
+import glob
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+ENDPOINTS = {
+    "mask": "/api/mask/",
+    "ppt": "/convert/ppt_to_pdf/",
+    "docx": "/convert/docx_to_pdf/",
+}
+DEFAULT_FILES = {"mask": "media/pdfs/*.pdf"}
+TERMINAL_STATUSES = ("Completed", "Failed", "Cancelled", "Error")
+PERCENTILES = (50, 90, 95, 99)
+
+
+# =============================
+# HTTP (표준 라이브러리만 사용)
+# =============================
+
+def _http(method, url, body=None, headers=None, timeout=60):
+    """(status, headers, body) 를 반환합니다. 4xx/5xx 도 예외 없이 반환합니다."""
+    request = urllib.request.Request(url, data=body, headers=headers or {}, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def _encode_multipart(fields, filename, data):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _percentile(values, pct):
+    """nearest-rank 백분위수: 정렬했을 때 ceil(pct/100 * n) 번째 값."""
+    if not values:
+        return None
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def _split_timing(timing, submitted_at):
+    """상태 API 의 단계별 시각 -> 큐 대기 / 처리 / (분할 작업) 범위 Subtask 대기 시간.
+
+    분할된 작업은 started_at ~ finished_at 사이에 범위 Subtask 들이 mask_large 에서 기다린 시간이
+    들어 있으므로, split_at ~ subtasks_started_at 을 subtask_wait_seconds 로 빼서 따로 보고합니다.
+    """
+    out = {}
+    queued_at = timing.get("queued_at", submitted_at)
+    started_at, finished_at = timing.get("started_at"), timing.get("finished_at")
+    if started_at is None:
+        return out
+    out["queue_seconds"] = started_at - queued_at
+    split_at, subtasks_started_at = timing.get("split_at"), timing.get("subtasks_started_at")
+    if split_at is not None:
+        out["split"] = True
+        if subtasks_started_at is not None:
+            out["subtask_wait_seconds"] = subtasks_started_at - split_at
+            if finished_at is not None:
+                out["processing_seconds"] = (split_at - started_at) + (finished_at - subtasks_started_at)
+    elif finished_at is not None:
+        out["processing_seconds"] = finished_at - started_at
+    return out
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# =============================
+# 로컬 스택 (redis-server + uvicorn + Celery Worker)
+# =============================
+
+class LocalStack:
+    """부하 테스트 동안만 쓰는 로컬 Redis / 웹 / Worker 프로세스 묶음."""
+
+    def __init__(self, stdout, web_workers, worker_concurrency, eager, env_overrides):
+        self.stdout = stdout
+        self.web_workers = web_workers
+        self.worker_concurrency = worker_concurrency
+        self.eager = eager
+        self.env_overrides = env_overrides
+        self.procs = []
+        self.log_dir = tempfile.mkdtemp(prefix="pdfmask-loadtest-")
+        self.base_url = None
+
+    def _spawn(self, name, cmd, env=None):
+        log = open(os.path.join(self.log_dir, f"{name}.log"), "wb")
+        proc = subprocess.Popen(
+            cmd, stdout=log, stderr=subprocess.STDOUT, env=env, cwd=settings.BASE_DIR, start_new_session=True,
+        )
+        self.procs.append((name, proc, log))
+        return proc
+
+    def start(self):
+        redis_server = shutil.which("redis-server")
+        if not redis_server:
+            raise CommandError("--local requires redis-server on PATH (apt-get install redis-server)")
+
+        redis_port, web_port = _free_port(), _free_port()
+        self._spawn("redis", [redis_server, "--port", str(redis_port), "--save", "", "--appendonly", "no"])
+        self._wait_for_redis(redis_port)
+
+        env = dict(
+            os.environ,
+            REDIS_HOST="127.0.0.1",
+            REDIS_PORT=str(redis_port),
+            METRICS_WORKER_PORT="0",  # 여러 Worker가 같은 포트를 잡지 않도록
+            CELERY_TASK_ALWAYS_EAGER="true" if self.eager else "false",
+            **self.env_overrides,
+        )
+        env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+        self._spawn("web", [
+            sys.executable, "-m", "uvicorn", "pdfuploader.asgi:application",
+            "--host", "127.0.0.1", "--port", str(web_port), "--workers", str(self.web_workers), "--log-level", "warning",
+        ], env)
+        if not self.eager:
+            queues = ",".join(settings.WORKER_QUEUE_NAMES)
+            self._spawn("worker", [
+                sys.executable, "-m", "celery", "-A", "pdfuploader", "worker",
+                "-Q", queues, "-c", str(self.worker_concurrency), "-l", "warning",
+            ], env)
+
+        self.base_url = f"http://127.0.0.1:{web_port}"
+        self._wait_for_web()
+        self.stdout.write(f"Local stack ready: {self.base_url} (redis :{redis_port}, logs {self.log_dir})")
+        return self.base_url
+
+    def _wait_for_redis(self, port, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=1) as s:
+                    s.sendall(b"*1\r\n$4\r\nPING\r\n")
+                    if s.recv(16).startswith(b"+PONG"):
+                        return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"redis-server did not start (see {self.log_dir}/redis.log)")
+
+    def _wait_for_web(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if _http("GET", f"{self.base_url}/health/live/", timeout=2)[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.5)
+        raise CommandError(f"Web server did not start (see {self.log_dir}/web.log)")
+
+    def stop(self):
+        for name, proc, log in reversed(self.procs):
+            if proc.poll() is None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    os.killpg(proc.pid, 9)
+                    proc.wait()
+            log.close()
+
+
+# =============================
+# 부하 생성
+# =============================
+
+class LoadRunner:
+    def __init__(self, base_url, files, form_fields, poll_interval, job_timeout):
+        self.base_url = base_url.rstrip("/")
+        self.files = files
+        self.form_fields = form_fields
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.records = []
+        self._lock = threading.Lock()
+
+    def run_job(self, kind, path, data, client_id):
+        record = {"kind": kind, "file": os.path.basename(path), "outcome": None}
+        started = time.monotonic()
+        submitted_at = time.time()
+        try:
+            fields = self.form_fields if kind == "mask" else {}
+            body, content_type = _encode_multipart(fields, os.path.basename(path), data)
+            # 클라이언트별 제한(429)이 한 IP로 몰리지 않도록 가상 클라이언트를 나눕니다.
+            headers = {"Content-Type": content_type, "X-Forwarded-For": client_id}
+            status, resp_headers, resp_body = _http("POST", self.base_url + ENDPOINTS[kind], body, headers)
+            record["submit_seconds"] = time.monotonic() - started
+            if status in (429, 503):
+                record.update(outcome=f"rejected_{status}", retry_after=resp_headers.get("Retry-After"))
+                return record
+            if status != 202:
+                record.update(outcome="error", http_status=status, message=resp_body[:200].decode(errors="ignore"))
+                return record
+
+            job_id = json.loads(resp_body)["job_id"]
+            record["job_id"] = job_id
+            data = self._wait_for_job(job_id, started)
+            if data is None:
+                record["outcome"] = "timeout"
+                return record
+
+            record.update(_split_timing(data.get("timing") or {}, submitted_at))
+
+            if data["status"] != "Completed":
+                record.update(outcome="failed", message=data.get("message"))
+                return record
+
+            status, _, content = _http("GET", f"{self.base_url}/api/download/{job_id}/")
+            if status != 200:
+                record.update(outcome="error", http_status=status)
+                return record
+            record.update(outcome="ok", output_bytes=len(content))
+            return record
+        except Exception as e:
+            record.update(outcome="error", message=str(e))
+            return record
+        finally:
+            record["e2e_seconds"] = time.monotonic() - started
+            with self._lock:
+                self.records.append(record)
+
+    def _wait_for_job(self, job_id, started):
+        url = f"{self.base_url}/api/status/{job_id}/?timing=1"
+        while time.monotonic() - started < self.job_timeout:
+            status, _, body = _http("GET", url)
+            if status == 200:
+                data = json.loads(body)
+                if data.get("status") in TERMINAL_STATUSES:
+                    return data
+            time.sleep(self.poll_interval)
+        return None
+
+    def run(self, rate, duration, mix, clients, max_inflight, rng):
+        kinds, weights = zip(*mix.items())
+        payloads = {kind: [(p, open(p, "rb").read()) for p in paths] for kind, paths in self.files.items()}
+        deadline = time.monotonic() + duration
+        sent = 0
+        with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+            next_at = time.monotonic()
+            while True:
+                next_at += rng.expovariate(rate)
+                if next_at >= deadline:
+                    break
+                time.sleep(max(0.0, next_at - time.monotonic()))
+                kind = rng.choices(kinds, weights)[0]
+                path, data = rng.choice(payloads[kind])
+                client = rng.randrange(clients)
+                client_id = f"10.0.{client // 256}.{client % 256}"
+                pool.submit(self.run_job, kind, path, data, client_id)
+                sent += 1
+        return sent
+
+
+# =============================
+# 보고서
+# =============================
+
+def summarize(records, wall_seconds):
+    def _stats(values):
+        return {f"p{p}": _percentile(values, p) for p in PERCENTILES} | {"max": max(values) if values else None}
+
+    groups = {"all": records}
+    for record in records:
+        groups.setdefault(record["kind"], []).append(record)
+    # 분할 처리된 대용량 문서는 지연 시간 구성이 다르므로 따로 집계합니다.
+    for record in records:
+        if record.get("split"):
+            groups.setdefault(f"{record['kind']}:split", []).append(record)
+
+    summary = {}
+    for name, group in groups.items():
+        ok = [r for r in group if r["outcome"] == "ok"]
+        counts = {}
+        for r in group:
+            counts[r["outcome"]] = counts.get(r["outcome"], 0) + 1
+        summary[name] = {
+            "sent": len(group),
+            "outcomes": counts,
+            "error_rate": (len(group) - len(ok)) / len(group) if group else 0.0,
+            "throughput_per_sec": len(ok) / wall_seconds if wall_seconds else 0.0,
+            "e2e_seconds": _stats([r["e2e_seconds"] for r in ok]),
+            "queue_seconds": _stats([r["queue_seconds"] for r in ok if "queue_seconds" in r]),
+            "processing_seconds": _stats([r["processing_seconds"] for r in ok if "processing_seconds" in r]),
+            "subtask_wait_seconds": _stats([r["subtask_wait_seconds"] for r in ok if "subtask_wait_seconds" in r]),
+            "submit_seconds": _stats([r["submit_seconds"] for r in group if "submit_seconds" in r]),
+        }
+    return summary
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+class Command(BaseCommand):
+    help = "실제 HTTP API 로 마스킹/변환 작업을 흘려 보내는 부하 테스트 (지연 시간 분포, 큐 대기 vs 처리 시간, 오류율)"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--base-url", help="이미 떠 있는 서버 주소 (예: http://127.0.0.1:8000)")
+        target.add_argument("--local", action="store_true", help="로컬 redis-server / uvicorn / Celery Worker 를 띄워서 테스트")
+        parser.add_argument("--eager", action="store_true", help="--local 에서 Worker 없이 웹 프로세스 안에서 Task 실행")
+        parser.add_argument("--web-workers", type=int, default=2, help="--local 웹 서버 프로세스 수")
+        parser.add_argument("--worker-concurrency", type=int, default=2, help="--local Celery Worker 동시 실행 수")
+        parser.add_argument("--no-admission", action="store_true", help="--local 에서 승인 제어(429/503)를 끔")
+        parser.add_argument("--rate", type=float, default=1.0, help="초당 평균 제출 수 (포아송 도착)")
+        parser.add_argument("--duration", type=float, default=60.0, help="제출을 계속할 시간 (초)")
+        parser.add_argument("--mix", default="mask=1", help="문서 종류 비율 (예: mask=0.7,ppt=0.2,docx=0.1)")
+        parser.add_argument("--file", action="append", default=[], metavar="KIND=GLOB",
+                            help="종류별 입력 파일 (여러 번 지정 가능, 기본: mask=media/pdfs/*.pdf)")
+        parser.add_argument("--mask-field", action="append", default=[], metavar="NAME=VALUE",
+                            help="/api/mask/ 에 함께 보낼 옵션 (예: mode=highlight)")
+        parser.add_argument("--clients", type=int, default=20, help="가상 클라이언트(IP) 수 (원격 대상은 TRUSTED_PROXY_COUNT 설정에 따라 무시될 수 있음)")
+        parser.add_argument("--max-inflight", type=int, default=200, help="동시에 진행할 수 있는 최대 작업 수 (부하 생성기 쪽)")
+        parser.add_argument("--poll-interval", type=float, default=0.5)
+        parser.add_argument("--job-timeout", type=float, default=600.0, help="작업 하나를 기다리는 최대 시간 (초)")
+        parser.add_argument("--seed", type=int, default=None, help="도착 간격 / 문서 선택 재현용 시드")
+        parser.add_argument("--json", dest="json_path", help="원시 기록과 요약을 JSON 으로 저장")
+
+    def _parse_pairs(self, values, option):
+        pairs = {}
+        for item in values:
+            for part in filter(None, item.split(",")):
+                if "=" not in part:
+                    raise CommandError(f"Invalid {option} entry: {part}")
+                key, value = part.split("=", 1)
+                pairs[key.strip()] = value.strip()
+        return pairs
+
+    def handle(self, *args, **options):
+        mix = {k: float(v) for k, v in self._parse_pairs([options["mix"]], "--mix").items()}
+        unknown = set(mix) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown document kind in --mix: {', '.join(sorted(unknown))}")
+
+        patterns = dict(DEFAULT_FILES, **self._parse_pairs(options["file"], "--file"))
+        files = {}
+        for kind in mix:
+            matches = sorted(glob.glob(os.path.join(settings.BASE_DIR, patterns.get(kind, ""))))
+            if not matches:
+                raise CommandError(f"No input files for '{kind}' (use --file {kind}=<glob>)")
+            files[kind] = matches
+
+        stack = None
+        base_url = options["base_url"]
+        if options["local"]:
+            # 가상 클라이언트 IP(X-Forwarded-For)를 웹 서버가 그대로 믿도록 프록시 1단 뒤에 있는 것처럼 설정합니다.
+            env_overrides = {"TRUSTED_PROXY_COUNT": "1"}
+            if options["no_admission"]:
+                env_overrides["ADMISSION_ENABLED"] = "false"
+            stack = LocalStack(self.stdout, options["web_workers"], options["worker_concurrency"], options["eager"], env_overrides)
+        try:
+            if stack:
+                base_url = stack.start()
+            runner = LoadRunner(
+                base_url, files, self._parse_pairs(options["mask_field"], "--mask-field"),
+                options["poll_interval"], options["job_timeout"],
+            )
+            self.stdout.write(f"Sending ~{options['rate']}/s for {options['duration']}s to {base_url} (mix {mix})")
+            started = time.monotonic()
+            sent = runner.run(
+                options["rate"], options["duration"], mix, options["clients"], options["max_inflight"],
+                random.Random(options["seed"]),
+            )
+            wall = time.monotonic() - started
+        finally:
+            if stack:
+                stack.stop()
+
+        summary = summarize(runner.records, wall)
+        self._print_report(summary, sent, wall)
+        if options["json_path"]:
+            with open(options["json_path"], "w") as f:
+                json.dump({"summary": summary, "records": runner.records}, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Report written to {options['json_path']}")
+
+    def _print_report(self, summary, sent, wall):
+        self.stdout.write(f"\n{sent} jobs sent, wall time {wall:.1f}s\n")
+        header = f"{'kind':<10} {'sent':>5} {'ok':>5} {'rej':>5} {'fail':>5} {'tmo':>5} {'err%':>6}  " \
+                 f"{'e2e p50/p90/p95/p99/max':<32} {'queue p50/p95':<14} {'proc p50/p95':<14} {'subtask p50/p95':<16} {'submit p95':>10}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, s in summary.items():
+            outcomes = s["outcomes"]
+            rejected = sum(v for k, v in outcomes.items() if k.startswith("rejected"))
+            failed = outcomes.get("failed", 0) + outcomes.get("error", 0)
+            e2e, queue, proc = s["e2e_seconds"], s["queue_seconds"], s["processing_seconds"]
+            subtask = s["subtask_wait_seconds"]
+            self.stdout.write(
+                f"{name:<10} {s['sent']:>5} {outcomes.get('ok', 0):>5} {rejected:>5} {failed:>5} "
+                f"{outcomes.get('timeout', 0):>5} {s['error_rate'] * 100:>5.1f}%  "
+                f"{'/'.join(_fmt(e2e[k]) for k in ('p50', 'p90', 'p95', 'p99', 'max')):<32} "
+                f"{_fmt(queue['p50']) + '/' + _fmt(queue['p95']):<14} "
+                f"{_fmt(proc['p50']) + '/' + _fmt(proc['p95']):<14} "
+                f"{_fmt(subtask['p50']) + '/' + _fmt(subtask['p95']):<16} {_fmt(s['submit_seconds']['p95']):>10}"
+            )
@@ -0,0 +1,308 @@
+'''Prometheus 메트릭 (웹 + Celery Worker 공용).
+
+- 웹: /metrics/ 에서 프로세스 메트릭과 큐 길이, 작업 폴더 / Blob 저장소 디스크 사용량을 노출합니다.
+- Worker: worker_ready 시점에 별도 HTTP 서버(METRICS_WORKER_PORT)를 띄웁니다.
+
+prefork Worker / 여러 gunicorn 워커처럼 프로세스가 여러 개일 때는
+PROMETHEUS_MULTIPROC_DIR 환경 변수를 지정해야 모든 프로세스의 값이 합산됩니다.
+'''
+
+import logging
+import os
+import shutil
+import time
+
+import redis
+from celery.signals import before_task_publish, task_prerun, task_postrun, worker_ready
+from django.conf import settings
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from pdfuploader.celery import app
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# 작업 단계별 시각 (queued_at / started_at / finished_at, epoch 초)
+JOB_TIMING_KEY = "job:timing:{task_id}"
+JOB_TIMING_TTL = 24 * 3600
+
+# =============================
+# Metric 정의
+# =============================
+
+TASK_DURATION = Histogram(
+    "pdfmask_task_duration_seconds", "Celery task 실행 시간",
+    ["task", "state"],
+    buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+JOB_STATUS = Counter(
+    "pdfmask_job_status_total", "작업 상태 변경 횟수", ["status"],
+)
+ENGINE_PAGES = Counter(
+    "pdfmask_engine_pages_total", "마스킹 엔진이 처리한 페이지 수",
+)
+ENGINE_SECONDS = Counter(
+    "pdfmask_engine_seconds_total", "마스킹 엔진 처리 시간 합계 (pages/sec = pages_total / seconds_total)",
+)
+ENGINE_RECTS_PER_PAGE = Histogram(
+    "pdfmask_engine_rects_per_page", "페이지당 마스킹 사각형 수",
+    buckets=(0, 5, 10, 25, 50, 100, 200, 400),
+)
+ENGINE_SAVE_SECONDS = Histogram(
+    "pdfmask_engine_save_seconds", "결과 PDF 저장 시간 (출력 프로필별)", ["profile"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+ENGINE_OUTPUT_BYTES = Histogram(
+    "pdfmask_engine_output_bytes", "결과 PDF 크기 (출력 프로필별)", ["profile"],
+    buckets=(1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8),
+)
+LIBREOFFICE_DURATION = Histogram(
+    "pdfmask_libreoffice_duration_seconds", "LibreOffice 변환 시간", ["kind"],
+    buckets=(1, 2, 5, 10, 20, 40, 60, 120, 180),
+)
+LIBREOFFICE_FAILURES = Counter(
+    "pdfmask_libreoffice_failures_total", "LibreOffice 변환 실패 횟수", ["kind"],
+)
+CACHE_REQUESTS = Counter(
+    "pdfmask_cache_requests_total", "캐시 조회 횟수 (hit rate 계산용)", ["cache", "result"],
+)
+ADMISSION_REJECTIONS = Counter(
+    "pdfmask_admission_rejections_total", "승인 제어로 거절된 제출 수 (429: 클라이언트 제한, 503: 과부하)", ["lane", "status"],
+)
+PREVIEW_DURATION = Histogram(
+    "pdfmask_preview_duration_seconds", "마스킹 미리보기 응답 시간 (result: ok, truncated, invalid, busy, timeout, error)", ["result"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 10),
+)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_engine_stats(stats):
+    """mask_pdf_bytes(stats=...) 로 채워진 통계를 반영합니다."""
+    ENGINE_PAGES.inc(stats.get("pages", 0))
+    ENGINE_SECONDS.inc(stats.get("seconds", 0.0))
+    for count in stats.get("rects_per_page", []):
+        ENGINE_RECTS_PER_PAGE.observe(count)
+    # 형태소 분석 저장소 (engine/analysis_store.py) 적중률
+    CACHE_REQUESTS.labels(cache="analysis", result="hit").inc(stats.get("analysis_hits", 0))
+    CACHE_REQUESTS.labels(cache="analysis", result="miss").inc(stats.get("analysis_misses", 0))
+    if "output_profile" in stats:
+        ENGINE_SAVE_SECONDS.labels(profile=stats["output_profile"]).observe(stats["save_seconds"])
+        ENGINE_OUTPUT_BYTES.labels(profile=stats["output_profile"]).observe(stats["output_bytes"])
+
+
+# =============================
+# Scrape 시점에 계산하는 Collector
+# =============================
+
+class QueueDepthCollector:
+    """Redis 브로커의 Celery 큐 길이 (우선순위별 하위 큐 포함)."""
+
+    def __init__(self):
+        self._client = None
+
+    def _redis(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(
+                settings.CELERY_BROKER_URL,
+                socket_connect_timeout=settings.CELERY_BROKER_CONNECTION_TIMEOUT,
+                socket_timeout=settings.CELERY_BROKER_CONNECTION_TIMEOUT,
+            )
+        return self._client
+
+    def collect(self):
+        gauge = GaugeMetricFamily("pdfmask_celery_queue_length", "Celery 큐에 대기 중인 작업 수", labels=["queue"])
+        try:
+            for queue, depth in get_queue_depths(self._redis()).items():
+                gauge.add_metric([queue], depth)
+        except Exception as e:
+            logger.warning(f"Queue depth collection failed: {e}")
+        yield gauge
+
+
+class JobDirCollector:
+    """공유 작업 폴더(/tmp/celery_jobs)와 로컬 Blob 저장소의 사용량과 남은 공간."""
+
+    def collect(self):
+        job_dir = settings.JOB_DIR
+        total_bytes, job_count = 0, 0
+        try:
+            with os.scandir(job_dir) as it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    job_count += 1
+                    total_bytes += _dir_size(entry.path)
+            free_bytes = shutil.disk_usage(job_dir).free
+        except FileNotFoundError:
+            free_bytes = 0
+
+        yield GaugeMetricFamily("pdfmask_job_dir_bytes", "작업 폴더 사용량 (bytes)", value=total_bytes)
+        yield GaugeMetricFamily("pdfmask_job_dir_jobs", "작업 폴더 개수", value=job_count)
+        yield GaugeMetricFamily("pdfmask_job_volume_free_bytes", "작업 볼륨 남은 공간 (bytes)", value=free_bytes)
+
+        # 업로드/결과 파일은 Blob 저장소에 쌓이므로 local 백엔드면 그 폴더도 따로 봅니다.
+        if settings.BLOB_STORAGE_BACKEND == "s3":
+            return
+        blob_root = settings.BLOB_LOCAL_ROOT
+        blob_bytes, blob_count = 0, 0
+        try:
+            with os.scandir(blob_root) as it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    for blob in os.scandir(entry.path):
+                        if blob.is_file(follow_symlinks=False):
+                            blob_count += entry.name != "tmp"
+                            blob_bytes += blob.stat(follow_symlinks=False).st_size
+            blob_free_bytes = shutil.disk_usage(blob_root).free
+        except FileNotFoundError:
+            blob_free_bytes = 0
+
+        yield GaugeMetricFamily("pdfmask_blob_bytes", "Blob 저장소 사용량 (bytes, 스테이징 포함)", value=blob_bytes)
+        yield GaugeMetricFamily("pdfmask_blob_count", "Blob 개수", value=blob_count)
+        yield GaugeMetricFamily("pdfmask_blob_volume_free_bytes", "Blob 볼륨 남은 공간 (bytes)", value=blob_free_bytes)
+
+
+def _dir_size(path):
+    size = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    size += entry.stat(follow_symlinks=False).st_size
+                elif entry.is_dir(follow_symlinks=False):
+                    size += _dir_size(entry.path)
+    except FileNotFoundError:
+        pass
+    return size
+
+
+def priority_queue_keys(queue):
+    """Redis 브로커에서 한 큐를 이루는 리스트 키들 (우선순위 하위 큐 <queue>:<n> 포함)."""
+    sep = settings.CELERY_BROKER_TRANSPORT_OPTIONS.get("sep", ":")
+    steps = settings.CELERY_BROKER_TRANSPORT_OPTIONS.get("priority_steps", [0])
+    return [queue if step == 0 else f"{queue}{sep}{step}" for step in steps]
+
+
+def get_queue_depths(client):
+    """큐 이름 -> 대기 작업 수. 우선순위 하위 큐(<queue>:<n>)까지 합산합니다."""
+    pipe = client.pipeline(transaction=False)
+    counts = []
+    for queue in settings.WORKER_QUEUE_NAMES:
+        keys = priority_queue_keys(queue)
+        counts.append(len(keys))
+        for key in keys:
+            pipe.llen(key)
+    lengths = pipe.execute()
+
+    depths, i = {}, 0
+    for queue, count in zip(settings.WORKER_QUEUE_NAMES, counts):
+        depths[queue] = sum(lengths[i:i + count])
+        i += count
+    return depths
+
+
+def _process_registry():
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+_WEB_REGISTRY = CollectorRegistry()
+_WEB_REGISTRY.register(QueueDepthCollector())
+_WEB_REGISTRY.register(JobDirCollector())
+
+_WORKER_REGISTRY = CollectorRegistry()
+_WORKER_REGISTRY.register(JobDirCollector())
+
+
+def render_web_metrics():
+    """/metrics/ 응답 본문 (text exposition format)."""
+    return generate_latest(_process_registry()) + generate_latest(_WEB_REGISTRY)
+
+
+# =============================
+# Celery Worker 측 계측
+# =============================
+
+_TASK_STARTED = {}
+
+
+def record_job_timing(task_id, field, overwrite=False):
+    """큐 대기 시간과 처리 시간을 나눠 볼 수 있도록 단계별 시각을 Redis 해시에 남깁니다.
+
+    분할 처리(replace)된 작업은 같은 task_id 로 여러 Task가 실행되므로
+    queued_at / started_at 은 처음 값만, finished_at 은 마지막 값을 남깁니다.
+    범위 Subtask 가 큐에서 기다린 시간은 split_at(나눈 시각) ~ subtasks_started_at(첫 범위 시작)으로
+    따로 남겨, 처리 시간에 섞이지 않게 합니다. (tasks.py 에서 기록)
+    """
+    if not task_id:
+        return
+    key = JOB_TIMING_KEY.format(task_id=task_id)
+    try:
+        pipe = app.backend.client.pipeline()
+        if overwrite:
+            pipe.hset(key, field, time.time())
+        else:
+            pipe.hsetnx(key, field, time.time())
+        pipe.expire(key, JOB_TIMING_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Job timing record failed for {task_id}: {e}")
+
+
+@before_task_publish.connect
+def _on_before_task_publish(headers=None, **kwargs):
+    record_job_timing((headers or {}).get("id"), "queued_at")
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, **kwargs):
+    _TASK_STARTED[task_id] = time.monotonic()
+    record_job_timing(task_id, "started_at")
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _TASK_STARTED.pop(task_id, None)
+    if started is not None and task is not None:
+        TASK_DURATION.labels(task=task.name, state=state or "UNKNOWN").observe(time.monotonic() - started)
+    record_job_timing(task_id, "finished_at", overwrite=True)
+
+
+class _WorkerMetricsHandler:
+    """Worker HTTP 서버용: 프로세스 메트릭 + 작업 폴더 메트릭을 함께 노출합니다."""
+
+    def collect(self):
+        yield from _process_registry().collect()
+        yield from _WORKER_REGISTRY.collect()
+
+
+@worker_ready.connect
+def _start_worker_metrics_server(**kwargs):
+    port = settings.METRICS_WORKER_PORT
+    if not port:
+        return
+    registry = CollectorRegistry()
+    registry.register(_WorkerMetricsHandler())
+    try:
+        start_http_server(port, registry=registry)
+        logger.info(f"Worker metrics server started on :{port}")
+    except OSError as e:
+        # 같은 호스트에서 여러 Worker가 뜨면 포트가 겹칠 수 있습니다.
+        logger.warning(f"Worker metrics server not started on :{port}: {e}")
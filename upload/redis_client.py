@@ -0,0 +1,135 @@
+'''웹 계층에서 공유하는 Redis 클라이언트 및 Celery 결과 조회 헬퍼.
+
+요청마다 AsyncResult 를 만들어 Redis 왕복을 반복하는 대신,
+커넥션 풀을 공유하는 redis.asyncio 클라이언트로 결과 키를 직접 읽습니다.
+여러 작업은 MGET 한 번으로 조회하고, 더 이상 바뀌지 않는 종료 상태
+(SUCCESS / FAILURE)는 프로세스 내부에 잠시 캐시합니다.
+'''
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+
+import redis.asyncio as aioredis
+from django.conf import settings
+
+from pdfuploader.celery import app
+
+from .metrics import JOB_TIMING_KEY, record_cache
+
+logger = logging.getLogger(__name__)
+
+# 더 이상 바뀌지 않는 Celery 상태 (REVOKED: 사용자가 취소한 작업)
+TERMINAL_STATES = ("SUCCESS", "FAILURE", "REVOKED")
+
+# redis.asyncio 커넥션은 이벤트 루프에 묶여 있으므로 루프마다 하나의 풀을 둡니다.
+# (uvicorn 워커는 프로세스당 루프가 하나이므로 사실상 프로세스당 하나)
+_CLIENTS = weakref.WeakKeyDictionary()
+_CLIENTS_LOCK = threading.Lock()
+
+# job_id -> (만료 시각, status, result)
+_TERMINAL_CACHE = {}
+_TERMINAL_CACHE_LOCK = threading.Lock()
+
+
+def get_redis():
+    """현재 이벤트 루프에서 사용할 공유(풀링된) Redis 클라이언트를 반환합니다."""
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(loop)
+        if client is None:
+            pool = aioredis.ConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                socket_connect_timeout=settings.CELERY_BROKER_CONNECTION_TIMEOUT,
+            )
+            client = aioredis.Redis(connection_pool=pool)
+            _CLIENTS[loop] = client
+    return client
+
+
+# =============================
+# Terminal State Cache
+# =============================
+
+def _cache_get(job_id):
+    with _TERMINAL_CACHE_LOCK:
+        entry = _TERMINAL_CACHE.get(job_id)
+        if entry is None:
+            return None
+        expires_at, status, result = entry
+        if expires_at < time.monotonic():
+            del _TERMINAL_CACHE[job_id]
+            return None
+        return status, result
+
+
+def _cache_put(job_id, status, result):
+    ttl = settings.STATUS_CACHE_TTL
+    if ttl <= 0:
+        return
+    with _TERMINAL_CACHE_LOCK:
+        if len(_TERMINAL_CACHE) >= settings.STATUS_CACHE_MAX_ENTRIES:
+            # 만료된 항목부터 정리하고, 그래도 가득 차면 가장 오래된 항목을 버립니다.
+            now = time.monotonic()
+            for key in [k for k, v in _TERMINAL_CACHE.items() if v[0] < now]:
+                del _TERMINAL_CACHE[key]
+            if len(_TERMINAL_CACHE) >= settings.STATUS_CACHE_MAX_ENTRIES:
+                del _TERMINAL_CACHE[next(iter(_TERMINAL_CACHE))]
+        _TERMINAL_CACHE[job_id] = (time.monotonic() + ttl, status, result)
+
+
+# =============================
+# Celery Result Lookup
+# =============================
+
+def _decode_meta(payload):
+    """Celery 결과 백엔드에 저장된 값을 (status, result)로 변환합니다."""
+    if payload is None:
+        # 결과 키가 없으면 큐 대기 중이거나 시작 전인 작업입니다.
+        return "PENDING", None
+    meta = app.backend.decode_result(payload)
+    status = meta.get("status", "PENDING")
+    result = meta.get("result") if status in TERMINAL_STATES else None
+    return status, result
+
+
+async def aget_task_states(job_ids):
+    """여러 작업의 (status, result)를 MGET 한 번으로 조회합니다.
+
+    반환값은 job_id -> (status, result) 딕셔너리입니다.
+    """
+    states = {}
+    missing = []
+    for job_id in job_ids:
+        cached = _cache_get(job_id)
+        record_cache("task_state", cached is not None)
+        if cached is not None:
+            states[job_id] = cached
+        elif job_id not in missing:
+            missing.append(job_id)
+
+    if missing:
+        keys = [app.backend.get_key_for_task(job_id) for job_id in missing]
+        payloads = await get_redis().mget(keys)
+        for job_id, payload in zip(missing, payloads):
+            status, result = _decode_meta(payload)
+            if status in TERMINAL_STATES:
+                _cache_put(job_id, status, result)
+            states[job_id] = (status, result)
+
+    return states
+
+
+async def aget_task_state(job_id):
+    """단일 작업의 (status, result)를 조회합니다."""
+    states = await aget_task_states([job_id])
+    return states[job_id]
+
+
+async def aget_job_timing(job_id):
+    """작업 단계별 시각 {queued_at, started_at, finished_at} (기록된 것만, epoch 초)."""
+    raw = await get_redis().hgetall(JOB_TIMING_KEY.format(task_id=job_id))
+    return {k.decode(): float(v) for k, v in raw.items()}
@@ -0,0 +1,122 @@
+'''마스킹 작업 스케줄링 (문서 크기 기반 우선순위 + 클라이언트별 공정 분배).
+
+Celery 기본 동작은 FIFO 라서 500쪽짜리 PDF 하나가 앞에 있으면 뒤의 2쪽짜리
+퀴즈 파일들이 모두 기다려야 합니다. 제출 시점에 페이지 수를 세어
+- 큰 문서는 mask_large 레인, 작은 문서는 mask_small 레인으로 보내고
+- 레인 안에서는 작은 문서일수록 높은 Celery 우선순위를 주며
+- 같은 클라이언트가 동시에 많은 작업을 올리면 우선순위를 점점 낮춥니다.
+'''
+
+import logging
+import time
+
+import fitz  # PyMuPDF
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis 브로커 우선순위: 0이 가장 높고 9가 가장 낮습니다.
+MAX_PRIORITY = 9
+
+# 클라이언트별 진행 중 작업 (ZSET: job_id -> 시작 시각)
+CLIENT_INFLIGHT_KEY = "mask:inflight_jobs:{client_id}"
+
+
+def count_pdf_pages(path):
+    """PDF 페이지 수를 셉니다. (xref만 읽으므로 빠름) 실패하면 None 을 반환합니다."""
+    try:
+        with fitz.open(path) as doc:
+            return doc.page_count
+    except Exception as e:
+        logger.warning(f"Page count failed for {path}: {e}")
+        return None
+
+
+def count_uploaded_pdf_pages(uploaded_file):
+    """업로드된 파일(Django UploadedFile)의 페이지 수를 셉니다. 실패하면 None 을 반환합니다."""
+    try:
+        if hasattr(uploaded_file, "temporary_file_path"):
+            return count_pdf_pages(uploaded_file.temporary_file_path())
+        uploaded_file.seek(0)
+        data = uploaded_file.read()
+        uploaded_file.seek(0)
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            return doc.page_count
+    except Exception as e:
+        logger.warning(f"Page count failed for upload {uploaded_file.name}: {e}")
+        return None
+
+
+def get_client_id(request):
+    """공정 분배 / 요청 제한 단위가 되는 클라이언트 식별자 (IP).
+
+    X-Forwarded-For 의 앞쪽 항목은 클라이언트가 마음대로 넣을 수 있으므로 쓰지 않습니다.
+    앞단 프록시가 TRUSTED_PROXY_COUNT 개 있으면 각 프록시가 뒤에 붙인 항목만 믿고,
+    오른쪽에서 TRUSTED_PROXY_COUNT 번째 항목(가장 바깥 프록시가 본 접속 IP)을 씁니다.
+    """
+    trusted = settings.TRUSTED_PROXY_COUNT
+    if trusted > 0:
+        hops = [hop.strip() for hop in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if hop.strip()]
+        if len(hops) >= trusted:
+            return hops[-trusted]
+    return request.META.get("REMOTE_ADDR") or "anonymous"
+
+
+def plan_mask_job(page_count, client_inflight=0):
+    """페이지 수와 클라이언트의 진행 중 작업 수로 (queue, priority)를 결정합니다."""
+    if page_count is None:
+        # 페이지 수를 모르면 큰 문서로 취급하여 작은 작업 레인을 보호합니다.
+        page_count = settings.MASK_LARGE_PAGE_THRESHOLD + 1
+
+    if page_count > settings.MASK_LARGE_PAGE_THRESHOLD:
+        queue = settings.MASK_QUEUE_LARGE
+    else:
+        queue = settings.MASK_QUEUE_SMALL
+
+    # 레인 안에서도 작은 문서가 먼저 처리되도록 크기 구간별 기본 우선순위를 둡니다.
+    size_rank = 0
+    for step, limit in enumerate(settings.MASK_PRIORITY_PAGE_STEPS):
+        if page_count > limit:
+            size_rank = (step + 1) * 2
+
+    # 이미 진행 중인 작업이 많을수록 우선순위를 낮춥니다. (공정 분배)
+    share_penalty = max(0, client_inflight) // settings.MASK_FAIR_SHARE_BATCH
+
+    return queue, min(MAX_PRIORITY, size_rank + share_penalty)
+
+
+# =============================
+# 클라이언트별 진행 중 작업 수 (Redis)
+# =============================
+
+async def aacquire_client_slot(redis, client_id, job_id):
+    """클라이언트의 진행 중 작업에 job_id 를 추가하고, 추가하기 전 작업 수를 반환합니다.
+
+    Worker가 죽거나 hard 시간 제한으로 반납이 누락된 작업이 클라이언트를 계속 막지 않도록,
+    MASK_INFLIGHT_TTL 보다 오래된 항목은 작업마다 따로 지웁니다.
+    (키 전체의 만료 시간은 클라이언트가 계속 요청하면 늘어나기만 하므로 기준으로 쓰지 않습니다.)
+    """
+    key = CLIENT_INFLIGHT_KEY.format(client_id=client_id)
+    now = time.time()
+    pipe = redis.pipeline()
+    pipe.zremrangebyscore(key, "-inf", now - settings.MASK_INFLIGHT_TTL)
+    pipe.zcard(key)
+    pipe.zadd(key, {job_id: now})
+    pipe.expire(key, settings.MASK_INFLIGHT_TTL)
+    _, count, _, _ = await pipe.execute()
+    return int(count)
+
+
+async def arelease_client_slot(redis, client_id, job_id):
+    """큐 제출에 실패했을 때 추가해 둔 진행 중 작업을 되돌립니다."""
+    await redis.zrem(CLIENT_INFLIGHT_KEY.format(client_id=client_id), job_id)
+
+
+def release_client_slot(redis, client_id, job_id):
+    """작업이 끝났을 때(Worker 측, 동기 클라이언트) 진행 중 작업에서 뺍니다. 여러 번 불러도 안전합니다."""
+    if not client_id:
+        return
+    try:
+        redis.zrem(CLIENT_INFLIGHT_KEY.format(client_id=client_id), job_id)
+    except Exception as e:
+        logger.warning(f"Failed to release client slot for {client_id}: {e}")
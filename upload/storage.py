@@ -0,0 +1,259 @@
+'''내용 주소 기반(content-addressed) Blob 저장소.
+
+업로드 파일과 결과 파일을 SHA-256 해시로 저장하여 같은 자료(예: 매 학기 같은 강의 자료)는
+한 번만 저장하고, Redis 참조 카운트가 0이 되면 삭제합니다.
+- local: 공유 볼륨의 폴더 (BLOB_LOCAL_ROOT)
+- s3: S3 호환 저장소 (AWS S3, 로컬 테스트는 MinIO). boto3 가 필요합니다.
+
+Task / 뷰 사이에서는 파일 경로 대신 "blob:<sha256>" 형태의 참조 문자열을 주고받습니다.
+모든 입출력은 청크 단위 스트리밍으로 처리하여 파일 전체를 메모리에 올리지 않습니다.
+'''
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+
+from pdfuploader.celery import app
+
+logger = logging.getLogger(__name__)
+
+BLOB_REF_PREFIX = "blob:"
+CHUNK_SIZE = 1024 * 1024
+
+REFCOUNT_KEY = "blob:refs:{digest}"
+LOCK_KEY = "blob:lock:{digest}"
+# 작업(owner)이 가진 참조를 이미 반납했는지 표시 (다운로드 재시도로 두 번 반납하지 않도록)
+RELEASED_KEY = "blob:released:{owner}:{digest}"
+RELEASED_TTL = 7 * 24 * 3600
+
+
+def is_blob_ref(value):
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+
+def _digest_of(ref):
+    if not is_blob_ref(ref):
+        raise ValueError(f"Not a blob reference: {ref}")
+    return ref[len(BLOB_REF_PREFIX):]
+
+
+# =============================
+# Backends: 해시 -> 실제 바이트 저장 위치
+# =============================
+
+class LocalBlobBackend:
+    """공유 볼륨 폴더에 <root>/<앞 2글자>/<sha256> 형태로 저장합니다."""
+
+    def __init__(self, root):
+        self.root = root
+        # 같은 파일시스템 안에서 os.replace 로 원자적으로 옮기기 위해 스테이징 폴더도 root 아래에 둡니다.
+        self.stage_dir = os.path.join(root, "tmp")
+        os.makedirs(self.stage_dir, exist_ok=True)
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def commit(self, tmp_path, digest):
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+
+    def exists(self, digest):
+        return os.path.exists(self._path(digest))
+
+    def size(self, digest):
+        return os.path.getsize(self._path(digest))
+
+    def delete(self, digest):
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def iter_chunks(self, digest, chunk_size=CHUNK_SIZE):
+        with open(self._path(digest), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def materialize(self, digest, dest_path):
+        # 하드링크는 쓰지 않습니다. LibreOffice 가 PDF 입력과 같은 경로에 결과를 쓰면
+        # 링크된 Blob 자체가 바뀌어, 같은 내용을 가진 다른 작업까지 깨집니다.
+        shutil.copyfile(self._path(digest), dest_path)
+
+
+class S3BlobBackend:
+    """S3 호환 저장소 (BLOB_S3_ENDPOINT_URL 로 MinIO 등 지정 가능)."""
+
+    def __init__(self, bucket, prefix="", endpoint_url=None):
+        try:
+            import boto3
+        except ImportError as e:
+            raise ImportError("S3 blob storage requires boto3 (pip install boto3)") from e
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.stage_dir = tempfile.gettempdir()
+
+    def _key(self, digest):
+        return f"{self.prefix}{digest[:2]}/{digest}"
+
+    def commit(self, tmp_path, digest):
+        try:
+            # upload_file 은 큰 파일을 멀티파트로 스트리밍 업로드합니다.
+            self.client.upload_file(tmp_path, self.bucket, self._key(digest))
+        finally:
+            os.remove(tmp_path)
+
+    def exists(self, digest):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(digest))
+            return True
+        except ClientError:
+            return False
+
+    def size(self, digest):
+        return self.client.head_object(Bucket=self.bucket, Key=self._key(digest))["ContentLength"]
+
+    def delete(self, digest):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(digest))
+
+    def iter_chunks(self, digest, chunk_size=CHUNK_SIZE):
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(digest))["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def materialize(self, digest, dest_path):
+        self.client.download_file(self.bucket, self._key(digest), dest_path)
+
+
+# =============================
+# BlobStore: 해시 저장 + 참조 카운트
+# =============================
+
+class BlobStore:
+    """Backend 위에 중복 제거와 참조 카운트(Redis)를 얹은 저장소."""
+
+    def __init__(self, backend, redis_client):
+        self.backend = backend
+        self.redis = redis_client
+
+    def _lock(self, digest):
+        # 같은 해시에 대해 "마지막 참조 삭제"와 "새 참조 추가"가 겹치지 않게 합니다.
+        return self.redis.lock(LOCK_KEY.format(digest=digest), timeout=60, blocking_timeout=30)
+
+    def put_chunks(self, chunks):
+        """청크 iterable 을 저장하고 참조(ref)를 반환합니다. 참조 카운트가 1 늘어납니다."""
+        sha = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.backend.stage_dir, prefix="blob-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    sha.update(chunk)
+                    out.write(chunk)
+            digest = sha.hexdigest()
+
+            with self._lock(digest):
+                count = self.redis.incr(REFCOUNT_KEY.format(digest=digest))
+                if count == 1 or not self.backend.exists(digest):
+                    self.backend.commit(tmp_path, digest)
+                    tmp_path = None
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return BLOB_REF_PREFIX + digest
+
+    def put_file(self, path):
+        def _chunks():
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        return self.put_chunks(_chunks())
+
+    def put_bytes(self, data):
+        return self.put_chunks(data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
+
+    def release(self, ref):
+        """참조 카운트를 1 줄이고, 0이 되면 실제 데이터를 삭제합니다."""
+        if not is_blob_ref(ref):
+            return
+        digest = _digest_of(ref)
+        try:
+            with self._lock(digest):
+                key = REFCOUNT_KEY.format(digest=digest)
+                if self.redis.decr(key) <= 0:
+                    self.redis.delete(key)
+                    self.backend.delete(digest)
+        except Exception as e:
+            logger.warning(f"Blob release failed for {digest}: {e}")
+
+    def release_once(self, ref, owner):
+        """owner(작업 ID)가 가진 참조를 한 번만 반납합니다. 이번 호출에서 반납했으면 True.
+
+        같은 결과를 여러 번 내려받거나 브라우저/프록시가 재시도해도 참조 카운트는 한 번만 줄어,
+        같은 내용을 결과로 가진 다른 작업의 Blob 이 지워지지 않습니다.
+        """
+        if not is_blob_ref(ref):
+            return False
+        digest = _digest_of(ref)
+        try:
+            first = self.redis.set(RELEASED_KEY.format(owner=owner, digest=digest), 1, nx=True, ex=RELEASED_TTL)
+        except Exception as e:
+            logger.warning(f"Blob release marker failed for {owner}/{digest}: {e}")
+            return False
+        if not first:
+            return False
+        self.release(ref)
+        return True
+
+    def exists(self, ref):
+        return self.backend.exists(_digest_of(ref))
+
+    def size(self, ref):
+        return self.backend.size(_digest_of(ref))
+
+    def iter_chunks(self, ref, chunk_size=CHUNK_SIZE):
+        return self.backend.iter_chunks(_digest_of(ref), chunk_size)
+
+    def read_bytes(self, ref):
+        return b"".join(self.iter_chunks(ref))
+
+    def materialize(self, ref, dest_path):
+        """LibreOffice / PyMuPDF 처럼 파일 경로가 필요한 곳을 위해 로컬 파일로 꺼냅니다."""
+        self.backend.materialize(_digest_of(ref), dest_path)
+        return dest_path
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_blob_store():
+    """설정(BLOB_STORAGE_BACKEND)에 맞는 BlobStore 싱글톤을 반환합니다."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            if settings.BLOB_STORAGE_BACKEND == "s3":
+                backend = S3BlobBackend(
+                    settings.BLOB_S3_BUCKET,
+                    prefix=settings.BLOB_S3_PREFIX,
+                    endpoint_url=settings.BLOB_S3_ENDPOINT_URL,
+                )
+            else:
+                backend = LocalBlobBackend(settings.BLOB_LOCAL_ROOT)
+            # 참조 카운트는 Celery 결과 백엔드의 Redis 연결(풀)을 재사용합니다.
+            _STORE = BlobStore(backend, app.backend.client)
+    return _STORE
@@ -1,14 +1,24 @@
 import os
+import time
 import shutil
+import signal
 import subprocess
 import logging
-from celery import shared_task
+from celery import shared_task, chord
+from celery.exceptions import Ignore, SoftTimeLimitExceeded
 from celery.result import AsyncResult # AsyncResult 임포트 (Helper 함수에 필요)
+from django.conf import settings
 
 # 기존 views.py에서 사용하던 모듈 임포트
-from engine.mask_engine import mask_pdf_bytes
+from engine.mask_engine import mask_pdf_bytes, merge_pdf_files, MaskCancelled
 from engine.ai_mask_engine import mask_pdf_bytes_ai
 
+from .scheduling import count_pdf_pages, plan_mask_job, release_client_slot
+from .storage import get_blob_store, is_blob_ref
+from .cancellation import JobCancelled, is_cancel_requested, make_cancel_checker
+from .admission import file_size_units, record_completed_work, record_subtask_started, record_subtasks_queued
+from . import metrics
+
 # Job Status를 추적하기 위해 Celery 인스턴스에 접근합니다.
 from pdfuploader.celery import app
 
@@ -25,6 +35,7 @@ def exec_update_job_status(job_id, status, result_path=None):
     """Celery Task 상태를 DB/Redis에 업데이트하는 함수입니다."""
     task = app.AsyncResult(job_id)
     # 실제 DB 업데이트 로직은 여기에 들어갑니다.
+    metrics.JOB_STATUS.labels(status=status).inc()
     logger.info(f"Job {job_id} status updated to: {status}")
 
 def exec_get_job_file_path(job_id, filename):
@@ -33,16 +44,114 @@ def exec_get_job_file_path(job_id, filename):
     os.makedirs(job_workdir, exist_ok=True)
     return os.path.join(job_workdir, filename)
 
+# 입력/결과는 Blob 저장소 참조("blob:<sha256>")로 주고받습니다.
+# (배포 전후로 큐에 남아 있던 작업을 위해 기존 파일 경로 입력도 그대로 지원합니다.)
+
+def exec_fetch_input(job_id, in_path, original_filename):
+    """LibreOffice처럼 파일 경로가 필요한 작업을 위해 입력을 작업 폴더로 꺼내고 경로를 반환합니다."""
+    if not is_blob_ref(in_path):
+        return in_path
+    ext = os.path.splitext(original_filename)[1]
+    local_path = exec_get_job_file_path(job_id, f"{job_id}{ext}")
+    return get_blob_store().materialize(in_path, local_path)
+
+def exec_read_input_bytes(in_path):
+    """입력 PDF를 bytes로 읽습니다."""
+    if is_blob_ref(in_path):
+        return get_blob_store().read_bytes(in_path)
+    if not os.path.exists(in_path):
+        # 🚨 파일 존재 여부 최종 확인
+        raise FileNotFoundError(f"Input file not found at {in_path}. Check Web Worker save path.")
+    with open(in_path, 'rb') as f:
+        return f.read()
+
+def exec_store_result_bytes(job_id, in_path, filename, data):
+    """결과를 저장하고 참조를 반환합니다. (기존 경로 입력이면 작업 폴더에 파일로 저장)"""
+    if is_blob_ref(in_path):
+        return get_blob_store().put_bytes(data)
+    out_path = exec_get_job_file_path(job_id, filename)
+    with open(out_path, 'wb') as out_f:
+        out_f.write(data)
+    return out_path
+
+def exec_release_input(job_id, in_path):
+    """작업이 끝난 입력의 참조를 반납하고, 로컬 작업 폴더(스크래치)를 정리합니다.
+    (분할 처리의 reduce Task와 실패 처리 Task가 모두 불러도 참조는 한 번만 반납됩니다.)"""
+    if not is_blob_ref(in_path):
+        return
+    get_blob_store().release_once(in_path, f"{job_id}:input")
+    shutil.rmtree(os.path.join(CELERY_JOB_DIR, job_id), ignore_errors=True)
+
+# =======================================================
+# Time Limit & Cancellation Helpers
+# - soft 시간 제한: SoftTimeLimitExceeded 를 받으면 정리(finally) 후 실패로 끝냅니다.
+# - 취소: 웹이 남긴 Redis 플래그를 Task 시작 시 / 페이지 사이 / LibreOffice 실행 중에 확인합니다.
+# =======================================================
+
+def exec_time_limits(kind):
+    """shared_task 에 넘길 soft/hard 시간 제한 (settings.TASK_SOFT_TIME_LIMITS)."""
+    soft = settings.TASK_SOFT_TIME_LIMITS[kind]
+    return {"soft_time_limit": soft, "time_limit": soft + settings.TASK_HARD_TIME_LIMIT_GRACE}
+
+def exec_cancel_checker(job_id):
+    """엔진/LibreOffice 대기 루프에서 반복 호출할 취소 확인 함수 (Redis 조회는 일정 간격으로만)."""
+    return make_cancel_checker(app.backend.client, job_id)
+
+def exec_check_cancelled(job_id):
+    """이미 취소 요청된 작업이면 JobCancelled 를 발생시킵니다. (큐에서 기다리던 중 취소된 경우)"""
+    if is_cancel_requested(app.backend.client, job_id):
+        raise JobCancelled(f"Job {job_id} was cancelled before start")
+
+def exec_mark_cancelled(job_id):
+    """작업 상태를 REVOKED 로 기록하고 Task를 끝냅니다. (Ignore: 반환값으로 상태를 덮어쓰지 않음)"""
+    exec_update_job_status(job_id, 'CANCELLED')
+    app.backend.mark_as_revoked(job_id, reason="cancelled by user")
+    raise Ignore()
+
+def exec_run_soffice(cmd, env, job_id):
+    """LibreOffice를 새 프로세스 그룹으로 실행합니다.
+
+    soffice 는 실제 변환을 자식 프로세스(soffice.bin)에서 하므로, 시간 초과 / 취소 /
+    soft 시간 제한으로 중단할 때는 프로세스 그룹 전체를 종료해야 좀비 변환기가 남지 않습니다.
+    """
+    should_cancel = exec_cancel_checker(job_id)
+    deadline = time.monotonic() + settings.LIBREOFFICE_TIMEOUT
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, start_new_session=True,
+    )
+    try:
+        while True:
+            try:
+                stdout, stderr = proc.communicate(timeout=max(0.1, settings.JOB_CANCEL_CHECK_INTERVAL))
+                return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+            except subprocess.TimeoutExpired:
+                if should_cancel():
+                    raise JobCancelled(f"Job {job_id} was cancelled during conversion")
+                if time.monotonic() > deadline:
+                    raise subprocess.TimeoutExpired(cmd, settings.LIBREOFFICE_TIMEOUT)
+    finally:
+        # 정상 종료 후에도 남아 있을 수 있는 자식 프로세스까지 정리합니다.
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        if proc.returncode is None:
+            proc.communicate()
+
 # =======================================================
 # 1. PPT -> PDF 비동기 변환 Task
 # =======================================================
 
-@shared_task(bind=True, name="ppt_to_pdf_task")
-def exec_ppt_to_pdf_task(self, job_id, in_path,original_filename):
+@shared_task(bind=True, name="ppt_to_pdf_task", **exec_time_limits("convert"))
+def exec_ppt_to_pdf_task(self, job_id, in_path,original_filename, client_id=None):
     exec_update_job_status(job_id, 'PROCESSING')
-    workdir = os.path.dirname(in_path)
+    source_ref = in_path
     
     try:
+        exec_check_cancelled(job_id)
+        in_path = exec_fetch_input(job_id, source_ref, original_filename)
+        workdir = os.path.dirname(in_path)
+
         env = os.environ.copy()
         env["HOME"] = "/tmp"
 
@@ -60,10 +169,9 @@ def exec_ppt_to_pdf_task(self, job_id, in_path,original_filename):
         ]
         
         # 💡 subprocess.run 호출 강화: stdout/stderr 캡쳐 유지
-        completed = subprocess.run(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            timeout=180, env=env 
-        )
+        started = time.monotonic()
+        completed = exec_run_soffice(cmd, env, job_id)
+        metrics.LIBREOFFICE_DURATION.labels(kind="ppt").observe(time.monotonic() - started)
         
         # 🚨 리턴 코드 != 0 검사 (LibreOffice가 오류 코드를 반환했을 때)
         if completed.returncode != 0:
@@ -79,27 +187,44 @@ def exec_ppt_to_pdf_task(self, job_id, in_path,original_filename):
             # LibreOffice가 0을 반환했지만 파일이 없는 경우, 상세 로그를 출력합니다.
             raise Exception(f"PDF file not produced. LibreOffice returned 0. Stdout: {completed.stdout.decode(errors='ignore')}. Stderr: {completed.stderr.decode(errors='ignore')}")
 
-        exec_update_job_status(job_id, 'COMPLETED', result_path=pdf_path)
-        return { "path" : pdf_path, "filename": download_name}
+        result_ref = get_blob_store().put_file(pdf_path) if is_blob_ref(source_ref) else pdf_path
+        # 승인 제어의 예상 대기 시간 계산용 처리량 기록 (작업량 단위: 입력 MB)
+        record_completed_work(app.backend.client, "convert", file_size_units(os.path.getsize(in_path)))
+        exec_update_job_status(job_id, 'COMPLETED', result_path=result_ref)
+        return { "path" : result_ref, "filename": download_name}
 
+    except JobCancelled:
+        logger.info(f"PPT to PDF job {job_id} cancelled")
+        exec_mark_cancelled(job_id)
+    except SoftTimeLimitExceeded:
+        logger.error(f"PPT to PDF Task timed out for {job_id}")
+        exec_update_job_status(job_id, 'TIMED_OUT')
+        raise
     except Exception as e:
         logger.error(f"PPT to PDF Task Failed for {job_id}: {e}")
+        metrics.LIBREOFFICE_FAILURES.labels(kind="ppt").inc()
         exec_update_job_status(job_id, 'FAILED')
         return None
     finally:
         # 작업 완료 후 LibreOffice 프로필 폴더 삭제 (Worker 환경 정리)
         shutil.rmtree(f"/tmp/libreoffice_profile/{job_id}", ignore_errors=True)
+        release_client_slot(app.backend.client, client_id, job_id)
+        exec_release_input(job_id, source_ref)
 
 # =======================================================
 # 2. DOCX -> PDF 비동기 변환 Task (수정 적용)
 # =======================================================
 
-@shared_task(bind=True, name="docx_to_pdf_task")
-def exec_docx_to_pdf_task(self, job_id, in_path,original_filename):
+@shared_task(bind=True, name="docx_to_pdf_task", **exec_time_limits("convert"))
+def exec_docx_to_pdf_task(self, job_id, in_path,original_filename, client_id=None):
     exec_update_job_status(job_id, 'PROCESSING')
-    workdir = os.path.dirname(in_path)
+    source_ref = in_path
     
     try:
+        exec_check_cancelled(job_id)
+        in_path = exec_fetch_input(job_id, source_ref, original_filename)
+        workdir = os.path.dirname(in_path)
+
         env = os.environ.copy()
         env["HOME"] = "/tmp"
 
@@ -113,10 +238,9 @@ def exec_docx_to_pdf_task(self, job_id, in_path,original_filename):
             in_path,
         ]
 
-        completed = subprocess.run(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            timeout=180, env=env 
-        )
+        started = time.monotonic()
+        completed = exec_run_soffice(cmd, env, job_id)
+        metrics.LIBREOFFICE_DURATION.labels(kind="docx").observe(time.monotonic() - started)
         
         if completed.returncode != 0:
             raise Exception(f"LibreOffice failed rc={completed.returncode}. STDOUT: {completed.stdout.decode(errors='ignore')}. STDERR: {completed.stderr.decode(errors='ignore')}")
@@ -128,15 +252,27 @@ def exec_docx_to_pdf_task(self, job_id, in_path,original_filename):
         if not os.path.exists(pdf_path):
              raise Exception(f"PDF file not produced. LibreOffice returned 0. Stdout: {completed.stdout.decode(errors='ignore')}. Stderr: {completed.stderr.decode(errors='ignore')}")
             
-        exec_update_job_status(job_id, 'COMPLETED', result_path=pdf_path)
-        return { "path" : pdf_path, "filename": download_name}
+        result_ref = get_blob_store().put_file(pdf_path) if is_blob_ref(source_ref) else pdf_path
+        record_completed_work(app.backend.client, "convert", file_size_units(os.path.getsize(in_path)))
+        exec_update_job_status(job_id, 'COMPLETED', result_path=result_ref)
+        return { "path" : result_ref, "filename": download_name}
 
+    except JobCancelled:
+        logger.info(f"DOCX to PDF job {job_id} cancelled")
+        exec_mark_cancelled(job_id)
+    except SoftTimeLimitExceeded:
+        logger.error(f"DOCX to PDF Task timed out for {job_id}")
+        exec_update_job_status(job_id, 'TIMED_OUT')
+        raise
     except Exception as e:
         logger.error(f"DOCX to PDF Task Failed for {job_id}: {e}")
+        metrics.LIBREOFFICE_FAILURES.labels(kind="docx").inc()
         exec_update_job_status(job_id, 'FAILED')
         return None
     finally:
         shutil.rmtree(f"/tmp/libreoffice_profile/{job_id}", ignore_errors=True)
+        release_client_slot(app.backend.client, client_id, job_id)
+        exec_release_input(job_id, source_ref)
 
 
 # =======================================================
@@ -144,24 +280,37 @@ def exec_docx_to_pdf_task(self, job_id, in_path,original_filename):
 # ...
 # =======================================================
 
-@shared_task(bind=True, name="mask_fast_task")
-def exec_mask_fast_task(self, job_id, in_path, opts,original_filename):
+@shared_task(bind=True, name="mask_fast_task", **exec_time_limits("mask_fast"))
+def exec_mask_fast_task(self, job_id, in_path, opts,original_filename, client_id=None, page_count=None):
     exec_update_job_status(job_id, 'PROCESSING')
+
+    # 대용량 문서는 페이지 범위 Subtask로 나누어 여러 Worker에서 처리합니다.
+    # replace 이후에는 reduce Task가 job_id의 결과를 대신 기록합니다.
+    # 이미 취소된 작업은 나누지 않고 아래에서 바로 정리합니다.
+    ranges = exec_plan_page_ranges(in_path, page_count)
+    if len(ranges) > 1 and not is_cancel_requested(app.backend.client, job_id):
+        logger.info(f"Fast Mask job {job_id} split into {len(ranges)} page ranges")
+        # replace 는 부모의 우선순위를 chord 로 넘기지 않고, 우선순위가 없는 메시지는 0(가장 높음)으로 처리됩니다.
+        # 제출 시 정한 우선순위(문서 크기 / 공정 분배)를 그대로 이어받게 합니다.
+        priority = (self.request.delivery_info or {}).get("priority")
+        if priority is None:
+            _, priority = plan_mask_job(ranges[-1][1] + 1)
+        workflow = exec_build_mask_chord(job_id, in_path, opts, original_filename, client_id, ranges, priority)
+        # 승인 제어가 큐의 범위 Task들을 작업 여러 개로 세지 않도록 따로 기록합니다.
+        record_subtasks_queued(app.backend.client, "mask", len(ranges), sum(to - start + 1 for start, to in ranges))
+        metrics.record_job_timing(job_id, "split_at")
+        return self.replace(workflow)
     
     try:
-        if not os.path.exists(in_path):
-             # 🚨 파일 존재 여부 최종 확인
-             raise FileNotFoundError(f"Input file not found at {in_path}. Check Web Worker save path.")
-             
-        with open(in_path, 'rb') as f:
-            pdf_bytes = f.read()
+        exec_check_cancelled(job_id)
+        pdf_bytes = exec_read_input_bytes(in_path)
         
-        out_bytes = mask_pdf_bytes(pdf_bytes, **opts)
+        stats = {}
+        out_bytes = mask_pdf_bytes(pdf_bytes, stats=stats, should_cancel=exec_cancel_checker(job_id), **opts)
+        metrics.record_engine_stats(stats)
+        record_completed_work(app.backend.client, "mask", stats.get("pages"))
         
-        result_filename = f"{job_id}_fast_masked.pdf"
-        out_path = exec_get_job_file_path(job_id, result_filename)
-        with open(out_path, 'wb') as out_f:
-            out_f.write(out_bytes)
+        out_path = exec_store_result_bytes(job_id, in_path, f"{job_id}_fast_masked.pdf", out_bytes)
         name_base, ext = os.path.splitext(original_filename)
         download_name = f"{name_base}_masked{ext}"
 
@@ -171,38 +320,208 @@ def exec_mask_fast_task(self, job_id, in_path, opts,original_filename):
             "filename": download_name
         }
         
+    except (JobCancelled, MaskCancelled):
+        logger.info(f"Fast Mask job {job_id} cancelled")
+        exec_mark_cancelled(job_id)
+    except SoftTimeLimitExceeded:
+        logger.error(f"Fast Mask Task timed out for {job_id}")
+        exec_update_job_status(job_id, 'TIMED_OUT')
+        raise
     except Exception as e:
         logger.error(f"Fast Mask Task Failed for {job_id}: {e}")
         exec_update_job_status(job_id, 'FAILED')
         return None
+    finally:
+        # 공정 분배용 클라이언트 진행 중 작업 수 감소 (결과 백엔드의 Redis 연결 재사용)
+        release_client_slot(app.backend.client, client_id, job_id)
+        exec_release_input(job_id, in_path)
+
+# =======================================================
+# 3-1. 대용량 문서 분할 처리 (Map-Reduce)
+# - map: 페이지 범위별로 마스킹하여 작업 폴더에 저장 (실패한 범위만 재시도)
+# - reduce: 범위별 결과를 순서대로 이어 붙여 최종 PDF 생성
+# =======================================================
+
+def exec_plan_page_ranges(in_path, page_count=None):
+    """문서를 나눌 (from_page, to_page) 목록을 반환합니다. 나눌 필요가 없으면 범위가 1개입니다."""
+    if page_count is None and not is_blob_ref(in_path):
+        page_count = count_pdf_pages(in_path)
+    if not page_count or page_count <= settings.MASK_SPLIT_PAGE_THRESHOLD:
+        return [(0, -1)]
+    chunk = settings.MASK_SPLIT_CHUNK_PAGES
+    return [(start, min(start + chunk, page_count) - 1) for start in range(0, page_count, chunk)]
+
+
+def exec_build_mask_chord(job_id, in_path, opts, original_filename, client_id, ranges, priority):
+    """페이지 범위 Subtask 그룹과 reduce Task로 구성된 chord를 만듭니다. (모두 부모 작업의 우선순위로 제출)"""
+    # 범위 Task는 큰 문서 레인에서 처리하여 작은 작업 레인을 보호합니다.
+    header = [
+        exec_mask_range_task.s(job_id, in_path, opts, from_page, to_page).set(
+            queue=settings.MASK_QUEUE_LARGE, priority=priority,
+        )
+        for from_page, to_page in ranges
+    ]
+    body = exec_mask_reduce_task.s(
+        job_id, original_filename, client_id, in_path, opts.get("output_profile", "auto"),
+    ).set(queue=settings.MASK_QUEUE_LARGE, priority=priority)
+    # 범위 Task가 재시도를 모두 쓰거나 hard 시간 제한으로 죽으면 reduce Task는 실행되지 않으므로,
+    # 정리(클라이언트 슬롯 / 입력 / 끝난 범위 결과)와 실패 기록은 errback 이 맡습니다.
+    body.link_error(exec_mask_chord_failed_task.s(job_id, client_id, in_path))
+    return chord(header, body)
+
+
+@shared_task(
+    bind=True, name="mask_range_task",
+    autoretry_for=(Exception,), dont_autoretry_for=(SoftTimeLimitExceeded,), max_retries=2, retry_backoff=True,
+    **exec_time_limits("mask_range"),
+)
+def exec_mask_range_task(self, job_id, in_path, opts, from_page, to_page):
+    # 예외를 삼키지 않고 그대로 올려 보내야 이 범위만 재시도됩니다.
+    # 취소된 경우에는 None 을 반환하고, reduce Task가 취소 처리와 정리를 맡습니다.
+    if not self.request.retries:
+        record_subtask_started(app.backend.client, "mask", to_page - from_page + 1)
+    metrics.record_job_timing(job_id, "subtasks_started_at")
+    if is_cancel_requested(app.backend.client, job_id):
+        return None
+    pdf_bytes = exec_read_input_bytes(in_path)
+
+    stats = {}
+    # 중간 결과는 reduce 단계에서 다시 저장하므로 가장 빠른 저장 프로필을 씁니다.
+    range_opts = dict(opts, from_page=from_page, to_page=to_page, output_profile="fast")
+    try:
+        out_bytes = mask_pdf_bytes(pdf_bytes, stats=stats, should_cancel=exec_cancel_checker(job_id), **range_opts)
+    except MaskCancelled:
+        return None
+    metrics.record_engine_stats(stats)
+    record_completed_work(app.backend.client, "mask", stats.get("pages"))
+
+    # 범위 결과도 Blob 저장소에 두어 다른 노드의 reduce Task가 읽을 수 있게 합니다.
+    range_filename = f"{job_id}_range_{from_page:05d}_{to_page:05d}.pdf"
+    range_path = exec_store_result_bytes(job_id, in_path, range_filename, out_bytes)
+    exec_record_range_result(job_id, from_page, range_path)
+    return range_path
+
+
+# 끝난 범위 결과 목록 (HASH: from_page -> 결과 참조/경로)
+# chord 가 실패하면 reduce Task가 결과 목록을 받지 못하므로, 정리할 대상을 여기서 찾습니다.
+RANGE_RESULTS_KEY = "mask:ranges:{job_id}"
+RANGE_RESULTS_TTL = 24 * 3600
+
+
+def exec_record_range_result(job_id, from_page, range_path):
+    key = RANGE_RESULTS_KEY.format(job_id=job_id)
+    pipe = app.backend.client.pipeline()
+    pipe.hset(key, from_page, range_path)
+    pipe.expire(key, RANGE_RESULTS_TTL)
+    pipe.execute()
+
+
+def exec_release_range_results(job_id):
+    """범위별 중간 결과 정리. reduce Task와 실패 처리 Task가 모두 불러도 한 번만 반납됩니다."""
+    key = RANGE_RESULTS_KEY.format(job_id=job_id)
+    try:
+        results = app.backend.client.hgetall(key)
+    except Exception as e:
+        logger.warning(f"Range results lookup failed for {job_id}: {e}")
+        return
+    for from_page, path in results.items():
+        from_page, path = from_page.decode(), path.decode()
+        if is_blob_ref(path):
+            get_blob_store().release_once(path, f"{job_id}:range:{from_page}")
+        elif os.path.exists(path):
+            os.remove(path)
+    app.backend.client.delete(key)
+
+
+@shared_task(bind=True, name="mask_reduce_task", **exec_time_limits("mask_reduce"))
+def exec_mask_reduce_task(self, range_paths, job_id, original_filename, client_id=None, in_path=None, output_profile="auto"):
+    try:
+        if None in range_paths:
+            raise JobCancelled(f"Job {job_id} was cancelled during range processing")
+        exec_check_cancelled(job_id)
+        local_paths = []
+        for i, path in enumerate(range_paths):
+            if is_blob_ref(path):
+                path = get_blob_store().materialize(path, exec_get_job_file_path(job_id, f"{job_id}_range_{i:05d}.pdf"))
+            local_paths.append(path)
+        out_bytes = merge_pdf_files(local_paths, output_profile)
+
+        out_path = exec_store_result_bytes(job_id, in_path, f"{job_id}_fast_masked.pdf", out_bytes)
+        name_base, ext = os.path.splitext(original_filename)
+        download_name = f"{name_base}_masked{ext}"
+
+        # 범위별 중간 파일 정리
+        exec_release_range_results(job_id)
+
+        exec_update_job_status(job_id, 'COMPLETED', result_path=out_path)
+        return {
+            "path": out_path,
+            "filename": download_name
+        }
+
+    except JobCancelled:
+        logger.info(f"Fast Mask job {job_id} cancelled")
+        exec_release_range_results(job_id)
+        exec_mark_cancelled(job_id)
+    except SoftTimeLimitExceeded:
+        logger.error(f"Fast Mask Reduce Task timed out for {job_id}")
+        exec_update_job_status(job_id, 'TIMED_OUT')
+        raise
+    except Exception as e:
+        logger.error(f"Fast Mask Reduce Task Failed for {job_id}: {e}")
+        exec_update_job_status(job_id, 'FAILED')
+        return None
+    finally:
+        release_client_slot(app.backend.client, client_id, job_id)
+        if in_path:
+            exec_release_input(job_id, in_path)
+
+@shared_task(name="mask_chord_failed_task")
+def exec_mask_chord_failed_task(request, exc, traceback, job_id, client_id=None, in_path=None):
+    """(chord errback) 범위 Task 또는 reduce Task가 최종 실패했을 때 자원을 정리하고 실패를 기록합니다.
+
+    작업 상태(FAILURE)는 Celery가 chord 결과(job_id)에 기록합니다.
+    reduce Task의 finally 가 이미 정리했더라도 다시 불러도 안전합니다.
+    """
+    logger.error(f"Fast Mask split job {job_id} failed: {exc}")
+    try:
+        exec_release_range_results(job_id)
+    finally:
+        release_client_slot(app.backend.client, client_id, job_id)
+        if in_path:
+            exec_release_input(job_id, in_path)
+        exec_update_job_status(job_id, 'FAILED')
 
 # =======================================================
 # 4. AI OCR Mask 비동기 Task (유지)
 # ...
 # =======================================================
 
-@shared_task(bind=True, name="mask_ai_ocr_task")
-def exec_mask_ai_ocr_task(self, job_id, in_path):
+@shared_task(bind=True, name="mask_ai_ocr_task", **exec_time_limits("mask_ai"))
+def exec_mask_ai_ocr_task(self, job_id, in_path, original_filename=None):
     exec_update_job_status(job_id, 'PROCESSING')
     
     try:
-        if not os.path.exists(in_path):
-             raise FileNotFoundError(f"Input file not found at {in_path}. Check Web Worker save path.")
-             
-        with open(in_path, 'rb') as f:
-            pdf_bytes = f.read()
+        exec_check_cancelled(job_id)
+        pdf_bytes = exec_read_input_bytes(in_path)
 
         masked_pdf = mask_pdf_bytes_ai(pdf_bytes)
         
-        result_filename = f"{job_id}_ai_masked.pdf"
-        out_path = exec_get_job_file_path(job_id, result_filename)
-        with open(out_path, 'wb') as out_f:
-            out_f.write(masked_pdf)
+        out_path = exec_store_result_bytes(job_id, in_path, f"{job_id}_ai_masked.pdf", masked_pdf)
 
         exec_update_job_status(job_id, 'COMPLETED', result_path=out_path)
         return out_path
         
+    except JobCancelled:
+        logger.info(f"AI OCR Mask job {job_id} cancelled")
+        exec_mark_cancelled(job_id)
+    except SoftTimeLimitExceeded:
+        logger.error(f"AI OCR Mask Task timed out for {job_id}")
+        exec_update_job_status(job_id, 'TIMED_OUT')
+        raise
     except Exception as e:
         logger.error(f"AI OCR Mask Task Failed for {job_id}: {e}")
         exec_update_job_status(job_id, 'FAILED')
-        return None
\ No newline at end of file
+        return None
+    finally:
+        exec_release_input(job_id, in_path)
\ No newline at end of file
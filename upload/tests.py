@@ -1,4 +1,273 @@
-from django.test import TestCase
+'''앱을 테스트 할 때 사용하는 파일
 
-# Create your tests here.
-'''앱을 테스트 할 때 사용하는 파일'''
\ No newline at end of file
+Redis 는 fakeredis 로 대신합니다. (pip install -r requirements-dev.txt)
+'''
+
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+import fakeredis
+import fakeredis.aioredis
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .admission import AVG_UNITS_KEY, DONE_KEY, aadmit_job, record_subtask_started, record_subtasks_queued
+from .management.commands.loadtest import _percentile, _split_timing
+from .metrics import PREVIEW_DURATION, priority_queue_keys
+from .scheduling import CLIENT_INFLIGHT_KEY, aacquire_client_slot, arelease_client_slot, get_client_id, release_client_slot
+from .storage import BlobStore, LocalBlobBackend, REFCOUNT_KEY, _digest_of
+from .tasks import exec_build_mask_chord
+from .views import mask_preview_api
+
+
+# =============================
+# Blob 저장소 (upload/storage.py)
+# =============================
+
+class BlobStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.redis = fakeredis.FakeRedis()
+        self.store = BlobStore(LocalBlobBackend(self.root), self.redis)
+
+    def refcount(self, ref):
+        value = self.redis.get(REFCOUNT_KEY.format(digest=_digest_of(ref)))
+        return int(value) if value is not None else 0
+
+    def test_same_content_is_stored_once(self):
+        a = self.store.put_bytes(b"same pdf")
+        b = self.store.put_bytes(b"same pdf")
+        self.assertEqual(a, b)
+        self.assertEqual(self.refcount(a), 2)
+        self.assertEqual(self.store.read_bytes(a), b"same pdf")
+
+    def test_release_deletes_after_last_reference(self):
+        ref = self.store.put_bytes(b"data")
+        self.store.put_bytes(b"data")
+        self.store.release(ref)
+        self.assertTrue(self.store.exists(ref))
+        self.store.release(ref)
+        self.assertFalse(self.store.exists(ref))
+        self.assertEqual(self.refcount(ref), 0)
+
+    def test_release_once_per_owner(self):
+        # 두 작업이 같은 결과를 만들고, 작업 A 결과를 두 번 내려받아도 작업 B 의 결과는 남아 있어야 합니다.
+        ref_a = self.store.put_bytes(b"identical output")
+        ref_b = self.store.put_bytes(b"identical output")
+        self.assertTrue(self.store.release_once(ref_a, "job-a"))
+        self.assertFalse(self.store.release_once(ref_a, "job-a"))
+        self.assertTrue(self.store.exists(ref_b))
+        self.assertEqual(self.refcount(ref_b), 1)
+
+        self.assertTrue(self.store.release_once(ref_b, "job-b"))
+        self.assertFalse(self.store.exists(ref_b))
+
+    def test_writing_to_materialized_file_keeps_blob(self):
+        # LibreOffice 는 PDF 입력과 같은 경로에 결과를 씁니다. Blob 내용은 바뀌면 안 됩니다.
+        ref = self.store.put_bytes(b"original")
+        dest = self.store.materialize(ref, f"{self.root}/job.pdf")
+        with open(dest, "wb") as f:
+            f.write(b"converted")
+        self.assertEqual(self.store.read_bytes(ref), b"original")
+
+    def test_release_ignores_non_blob_paths(self):
+        self.assertFalse(self.store.release_once("/tmp/celery_jobs/x.pdf", "job"))
+        self.store.release("/tmp/celery_jobs/x.pdf")
+
+
+# =============================
+# 대용량 문서 분할 (upload/tasks.py)
+# =============================
+
+class MaskChordTests(SimpleTestCase):
+    def test_subtasks_keep_parent_priority(self):
+        # 우선순위가 없으면 0(가장 높음)으로 처리되어 큰 문서의 범위 Task가 다른 작업을 모두 앞지릅니다.
+        workflow = exec_build_mask_chord("job", "blob:abc", {}, "a.pdf", "1.2.3.4", [(0, 24), (25, 49)], 6)
+        for sig in list(workflow.tasks) + [workflow.body]:
+            self.assertEqual(sig.options["priority"], 6)
+            self.assertEqual(sig.options["queue"], "mask_large")
+# =============================
+
+@override_settings(MASK_INFLIGHT_TTL=3600)
+class ClientSlotTests(SimpleTestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.redis = fakeredis.aioredis.FakeRedis(server=self.server)
+
+    async def test_acquire_returns_count_before_adding(self):
+        self.assertEqual(await aacquire_client_slot(self.redis, "1.2.3.4", "job-1"), 0)
+        self.assertEqual(await aacquire_client_slot(self.redis, "1.2.3.4", "job-2"), 1)
+        await arelease_client_slot(self.redis, "1.2.3.4", "job-1")
+        self.assertEqual(await aacquire_client_slot(self.redis, "1.2.3.4", "job-3"), 1)
+
+    async def test_leaked_slot_expires_while_client_stays_active(self):
+        # 반납이 누락된 오래된 작업은 다음 요청 때 지워져야 합니다. (키 만료 시간이 계속 늘어나도)
+        key = CLIENT_INFLIGHT_KEY.format(client_id="1.2.3.4")
+        await self.redis.zadd(key, {"leaked-job": time.time() - 3601})
+        self.assertEqual(await aacquire_client_slot(self.redis, "1.2.3.4", "job-1"), 0)
+        self.assertEqual(await self.redis.zrange(key, 0, -1), [b"job-1"])
+
+    async def test_worker_release_is_idempotent(self):
+        await aacquire_client_slot(self.redis, "1.2.3.4", "job-1")
+        sync_redis = fakeredis.FakeRedis(server=self.server)
+        release_client_slot(sync_redis, "1.2.3.4", "job-1")
+        release_client_slot(sync_redis, "1.2.3.4", "job-1")
+        self.assertEqual(await aacquire_client_slot(self.redis, "1.2.3.4", "job-2"), 0)
+
+
+class ClientIdTests(SimpleTestCase):
+    def request(self, forwarded=None):
+        extra = {"HTTP_X_FORWARDED_FOR": forwarded} if forwarded else {}
+        return RequestFactory().post("/", REMOTE_ADDR="10.0.0.1", **extra)
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_forwarded_header_ignored_without_trusted_proxy(self):
+        self.assertEqual(get_client_id(self.request("6.6.6.6")), "10.0.0.1")
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_uses_hop_appended_by_trusted_proxy(self):
+        # 클라이언트가 넣은 앞쪽 항목을 바꿔 가며 보내도 같은 식별자로 묶여야 합니다.
+        self.assertEqual(get_client_id(self.request("6.6.6.6, 1.2.3.4")), "1.2.3.4")
+        self.assertEqual(get_client_id(self.request("7.7.7.7, 1.2.3.4")), "1.2.3.4")
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_counts_trusted_proxies_from_the_right(self):
+        self.assertEqual(get_client_id(self.request("6.6.6.6, 1.2.3.4, 35.0.0.1")), "1.2.3.4")
+        # 프록시를 거치지 않아 항목이 모자라면 직접 접속한 주소를 씁니다.
+        self.assertEqual(get_client_id(self.request("1.2.3.4")), "10.0.0.1")
+
+
+# =============================
+# 승인 제어 (upload/admission.py)
+# =============================
+
+# 분의 30초 지점: 최근 5분 처리량 = 기록된 작업량 / 270초
+NOW = 1_700_000_010.0
+LANES = {"mask": {"queues": ["mask_small", "mask_large"], "max_queue_depth": 10, "max_wait_seconds": 100}}
+
+
+@override_settings(
+    ADMISSION_ENABLED=True, ADMISSION_LANES=LANES, ADMISSION_CLIENT_RATE_LIMIT=2, ADMISSION_CLIENT_RATE_WINDOW=60,
+    ADMISSION_CLIENT_MAX_INFLIGHT=0, ADMISSION_THROUGHPUT_WINDOW_MINUTES=5,
+    ADMISSION_DEFAULT_RETRY_AFTER=30, ADMISSION_MAX_RETRY_AFTER=600,
+)
+@mock.patch("upload.admission.time.time", return_value=NOW)
+class AdmissionTests(SimpleTestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.redis = fakeredis.aioredis.FakeRedis(server=self.server)
+        self.jobs = 0
+
+    async def admit(self, units=10, client_id="1.2.3.4"):
+        self.jobs += 1
+        return await aadmit_job(self.redis, "mask", units, client_id, f"job-{self.jobs}")
+
+    async def set_throughput(self, units_per_second):
+        minute = int(NOW // 60)
+        await self.redis.set(DONE_KEY.format(lane="mask", minute=minute), units_per_second * 270)
+
+    async def enqueue(self, queue, count):
+        await self.redis.rpush(priority_queue_keys(queue)[0], *[b"msg"] * count)
+
+    async def test_client_rate_retry_after_is_rest_of_window(self, _):
+        self.assertTrue((await self.admit()).admitted)
+        self.assertTrue((await self.admit()).admitted)
+        rejected = await self.admit()
+        self.assertEqual((rejected.status, rejected.retry_after), (429, 30))
+
+    async def test_rejected_requests_do_not_count(self, _):
+        # 과부하로 거절된 재시도가 요청 속도 카운터와 평균 작업량을 바꾸면 안 됩니다.
+        await self.enqueue("mask_small", 10)
+        for _ in range(5):
+            self.assertEqual((await self.admit(units=500)).status, 503)
+        self.assertIsNone(await self.redis.get(AVG_UNITS_KEY.format(lane="mask")))
+        await self.redis.delete(priority_queue_keys("mask_small")[0])
+        self.assertTrue((await self.admit()).admitted)
+        self.assertTrue((await self.admit()).admitted)
+
+    async def test_queue_depth_retry_after(self, _):
+        await self.redis.set(AVG_UNITS_KEY.format(lane="mask"), 20)
+        await self.set_throughput(2)
+        await self.enqueue("mask_small", 12)
+        rejected = await self.admit()
+        # 상한 10 을 3개 넘음 -> 3 x 20쪽 / 초당 2쪽
+        self.assertEqual((rejected.status, rejected.retry_after), (503, 30))
+
+    async def test_estimated_wait_retry_after(self, _):
+        await self.redis.set(AVG_UNITS_KEY.format(lane="mask"), 20)
+        await self.set_throughput(1)
+        await self.enqueue("mask_small", 4)
+        # (4 x 20 + 10) / 1 = 90초 -> 승인
+        self.assertTrue((await self.admit(units=10)).admitted)
+        # 승인된 작업으로 평균이 18쪽이 됨: (4 x 18 + 40) / 1 = 112초 -> 최대 100초를 12초 넘음
+        rejected = await self.admit(units=40)
+        self.assertEqual((rejected.status, rejected.retry_after), (503, 12))
+
+    async def test_range_subtasks_count_by_pages(self, _):
+        await self.redis.set(AVG_UNITS_KEY.format(lane="mask"), 20)
+        await self.set_throughput(1)
+        # 200쪽 문서를 25쪽씩 8개로 나눈 범위 Task: 작업 8개(8 x 20쪽)가 아니라 200쪽으로 계산
+        await self.enqueue("mask_large", 8)
+        sync_redis = fakeredis.FakeRedis(server=self.server)
+        record_subtasks_queued(sync_redis, "mask", 8, 200)
+        self.assertEqual((await self.admit(units=10)).retry_after, 110)
+        # 범위 Task 6개가 시작되면 남은 50쪽만 기다립니다.
+        await self.redis.ltrim(priority_queue_keys("mask_large")[0], 0, 1)
+        for _ in range(6):
+            record_subtask_started(sync_redis, "mask", 25)
+        self.assertTrue((await self.admit(units=10)).admitted)
+
+    async def test_unknown_throughput_uses_default_retry_after(self, _):
+        await self.enqueue("mask_small", 10)
+        rejected = await self.admit()
+        self.assertEqual((rejected.status, rejected.retry_after), (503, 30))
+
+
+# =============================
+# 부하 테스트 집계 (loadtest)
+# =============================
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        hundred = list(range(100, 0, -1))
+        self.assertEqual([_percentile(hundred, p) for p in (50, 90, 95, 99, 100)], [50, 90, 95, 99, 100])
+        ten = list(range(1, 11))
+        self.assertEqual([_percentile(ten, p) for p in (50, 90, 95, 99)], [5, 9, 10, 10])
+        self.assertEqual(_percentile([3.5], 99), 3.5)
+        self.assertIsNone(_percentile([], 50))
+
+
+class SplitTimingTests(SimpleTestCase):
+    def test_plain_job(self):
+        timing = {"queued_at": 100.0, "started_at": 102.0, "finished_at": 105.0}
+        self.assertEqual(_split_timing(timing, 99.0), {"queue_seconds": 2.0, "processing_seconds": 3.0})
+
+    def test_split_job_excludes_subtask_queue_wait(self):
+        # 나눈 뒤 범위 Subtask 들이 mask_large 에서 7초 기다린 시간은 처리 시간에서 빠집니다.
+        timing = {"queued_at": 100.0, "started_at": 102.0, "split_at": 103.0, "subtasks_started_at": 110.0, "finished_at": 120.0}
+        self.assertEqual(
+            _split_timing(timing, 99.0),
+            {"queue_seconds": 2.0, "split": True, "subtask_wait_seconds": 7.0, "processing_seconds": 11.0},
+        )
+
+
+# =============================
+# 마스킹 미리보기 (upload/views.py)
+# =============================
+
+def _preview_count(result):
+    for metric in PREVIEW_DURATION.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count") and sample.labels.get("result") == result:
+                return sample.value
+    return 0
+
+
+class MaskPreviewMetricTests(SimpleTestCase):
+    async def test_rejected_preview_is_observed(self):
+        before = _preview_count("invalid")
+        response = await mask_preview_api(RequestFactory().post("/api/mask/preview/", {}))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(_preview_count("invalid"), before + 1)
@@ -4,6 +4,10 @@ from . import views
 urlpatterns = [
     # 헬스 체크
     path("health/", views.health, name="health"),
+    path("health/live/", views.health, name="health_live"),
+    path("health/ready/", views.readiness, name="health_ready"),
+    # Prometheus 메트릭
+    path("metrics/", views.metrics_view, name="metrics"),
 
     # 메인 페이지 및 라우팅 
     path("", views.index_page, name="index"),
@@ -14,6 +18,7 @@ urlpatterns = [
 
     # 1. 기존 API 엔드포인트: 이제 Task 위임 역할만 합니다.
     path("api/mask/", views.mask_api, name="mask_api"),
+    path("api/mask/preview/", views.mask_preview_api, name="mask_preview_api"),
     path("api/mask_ai/", views.mask_ai_api, name="mask_ai_api"),
 
     # 2. 파일 변환 엔드포인트: 이제 Task 위임 역할만 합니다.
@@ -22,7 +27,12 @@ urlpatterns = [
 
     # 3. 새로운 Polling API: 작업 상태 확인
     path("api/status/<uuid:job_id>/", views.get_job_status, name="get_job_status"),
+    # 3-1. 일괄 Polling API: 여러 작업 상태를 한 번에 확인 (Redis MGET 1회)
+    path("api/status/batch/", views.get_job_status_batch, name="get_job_status_batch"),
     
+    # 3-2. 작업 취소 API
+    path("api/cancel/<uuid:job_id>/", views.cancel_job, name="cancel_job"),
+
     # 4. 새로운 Download API: 결과 다운로드
     path("api/download/<uuid:job_id>/", views.download_result, name="download_result"),
 ]
\ No newline at end of file
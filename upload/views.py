@@ -1,15 +1,34 @@
-from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, FileResponse
-from django.views.decorators.http import require_http_methods
-from django.views.decorators.csrf import csrf_exempt
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, StreamingHttpResponse
 from django.shortcuts import render
 import os
+import json
+import asyncio
+import base64
 import logging
+import threading
+import time
 import uuid
 import shutil
 import tempfile
-from celery.result import AsyncResult # Celery 작업 상태 확인용
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.utils.encoding import escape_uri_path # 한글 파일명 처리용 
 
+from .redis_client import get_redis, aget_task_state, aget_task_states, aget_job_timing, TERMINAL_STATES # Celery 작업 상태 확인용 (공유 Redis 풀)
+from .cancellation import arequest_cancel
+from .admission import aadmit_job, file_size_units
+from .metrics import PREVIEW_DURATION, record_engine_stats, render_web_metrics
+from .storage import get_blob_store, is_blob_ref
+from .health import check_readiness
+from prometheus_client import CONTENT_TYPE_LATEST as PROMETHEUS_CONTENT_TYPE
+from .scheduling import (
+    count_uploaded_pdf_pages,
+    get_client_id,
+    plan_mask_job,
+    arelease_client_slot,
+)
+
 
 from .tasks import (
     exec_ppt_to_pdf_task, 
@@ -17,9 +36,15 @@ from .tasks import (
     exec_mask_fast_task, 
     exec_mask_ai_ocr_task
 )
+from engine.mask_engine import preview_pdf_pages, validate_mask_patterns
 logger = logging.getLogger(__name__)
 
-CELERY_JOB_DIR = "/tmp/celery_jobs"
+# 다운로드 스트리밍 시 한 번에 읽는 크기 (1MB)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 웹 프로세스당 동시 미리보기 수 제한.
+# 시간 초과로 응답을 먼저 보내도 계산 스레드가 끝날 때 반납되므로 CPU 사용량이 상한을 넘지 않습니다.
+_PREVIEW_SLOTS = threading.BoundedSemaphore(settings.MASK_PREVIEW_MAX_CONCURRENCY)
 
 # =============================
 # Helper: 파일 처리 및 Job ID 생성
@@ -27,42 +52,176 @@ CELERY_JOB_DIR = "/tmp/celery_jobs"
 
 def save_uploaded_file_and_get_path(uploaded_file, job_id):
     """
-    업로드된 파일을 임시 작업 디렉토리에 저장하고 경로를 반환합니다.
-    중요: 파일명을 job_id로 변경하여 특수문자/공백 문제를 원천 차단합니다.
+    업로드된 파일을 Blob 저장소(내용 해시 기반)에 스트리밍으로 저장하고 참조("blob:<sha256>")를 반환합니다.
+    같은 파일이 이미 있으면 새로 저장하지 않고 참조 카운트만 늘립니다.
+    중요: 원본 파일명은 저장 경로에 쓰지 않으므로 특수문자/공백 문제가 생기지 않습니다.
     """
-    # 1. 작업 디렉토리 생성
-    job_workdir = os.path.join(CELERY_JOB_DIR, job_id)
-    os.makedirs(job_workdir, exist_ok=True)
-    
-    # 2. 확장자 추출 (예: .pptx)
-    ext = os.path.splitext(uploaded_file.name)[1]
-    
-    # 3. 안전한 파일명 생성 (예: a1b2-c3d4.pptx)
-    safe_filename = f"{job_id}{ext}"
-    
-    # 4. 저장 경로 결합
-    in_path = os.path.join(job_workdir, safe_filename)
-    
-    # 5. 파일 저장
-    with open(in_path, "wb") as out:
-        for chunk in uploaded_file.chunks():
-            out.write(chunk)
-            
-    return in_path
+    in_ref = get_blob_store().put_chunks(uploaded_file.chunks())
+    logger.info(f"Upload stored for job {job_id}: {in_ref}")
+    return in_ref
 
 
 def generate_unique_id():
     """작업의 고유 ID를 생성합니다."""
     return str(uuid.uuid4())
 
+
+# =============================
+# Helper: Async (ASGI) 지원
+# =============================
+# Django 4.2의 csrf_exempt / require_http_methods 는 async 뷰를 감싸면
+# 동기 뷰로 취급되므로, async 뷰 전용 데코레이터를 따로 둡니다.
+
+def async_csrf_exempt(view_func):
+    """async 뷰에 CSRF 예외 표시만 붙입니다. (래핑하지 않음)"""
+    view_func.csrf_exempt = True
+    return view_func
+
+
+def async_require_http_methods(request_method_list):
+    """require_http_methods 의 async 버전입니다."""
+    def decorator(func):
+        @wraps(func)
+        async def inner(request, *args, **kwargs):
+            if request.method not in request_method_list:
+                return HttpResponseNotAllowed(request_method_list)
+            return await func(request, *args, **kwargs)
+        return inner
+    return decorator
+
+
+def _read_upload_request(request):
+    """multipart 본문 파싱(디스크 I/O 포함)을 수행하고 (FILES, POST)를 반환합니다."""
+    return request.FILES, request.POST
+
+
+async def aread_upload_request(request):
+    """업로드 본문 파싱을 스레드에서 수행하여 이벤트 루프를 막지 않습니다."""
+    return await sync_to_async(_read_upload_request, thread_sensitive=False)(request)
+
+
+async def asave_uploaded_file_and_get_path(uploaded_file, job_id):
+    """save_uploaded_file_and_get_path 의 non-blocking 버전입니다."""
+    return await sync_to_async(save_uploaded_file_and_get_path, thread_sensitive=False)(uploaded_file, job_id)
+
+
+async def aapply_async(task, **kwargs):
+    """Celery apply_async (Redis 왕복)를 스레드에서 수행합니다."""
+    return await sync_to_async(task.apply_async, thread_sensitive=False)(**kwargs)
+
+
+async def aadmit_request(request, lane, job_units, job_id):
+    """승인 제어(upload/admission.py)를 거칩니다.
+
+    (client_id, admission, 거절 응답) 을 반환하며, 승인되면 거절 응답은 None 입니다.
+    승인된 뒤 제출에 실패하면 arelease_client_slot 으로 진행 중 작업 수를 되돌려야 합니다.
+    """
+    client_id = get_client_id(request)
+    try:
+        admission = await aadmit_job(get_redis(), lane, job_units, client_id, job_id)
+    except Exception:
+        logger.exception("CRITICAL EXCEPTION: Admission check failed.")
+        return client_id, None, JsonResponse({"error": "Failed to submit job to queue. Check Redis/Celery connection."}, status=500)
+    if not admission.admitted:
+        # 과부하(503) / 클라이언트 제한(429): 언제 다시 시도하면 되는지 알려 줍니다.
+        response = JsonResponse({"error": admission.reason, "retry_after": admission.retry_after}, status=admission.status)
+        response["Retry-After"] = str(admission.retry_after)
+        return client_id, admission, response
+    return client_id, admission, None
+
+
+async def _stream_file_and_cleanup(path, job_dir):
+    """결과 파일을 청크 단위로 스트리밍하고, 전송이 끝나면 작업 폴더를 정리합니다."""
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        while True:
+            chunk = await asyncio.to_thread(f.read, DOWNLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+        # 서버 청소
+        await asyncio.to_thread(shutil.rmtree, job_dir, True)
+
+
+async def _stream_blob_and_release(result_ref, job_id):
+    """Blob 저장소의 결과를 청크 단위로 스트리밍하고, 전송이 끝나면 작업의 참조를 반납합니다.
+
+    같은 작업을 여러 번 내려받아도 참조는 한 번만 반납합니다. (BlobStore.release_once)
+    """
+    store = get_blob_store()
+    chunks = await asyncio.to_thread(store.iter_chunks, result_ref, DOWNLOAD_CHUNK_SIZE)
+    try:
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        await asyncio.to_thread(chunks.close)
+        await asyncio.to_thread(store.release_once, result_ref, job_id)
+
+
+def _build_status_response(job_id, task_status, task_result):
+    """Celery 상태를 클라이언트용 상태 응답(dict)으로 변환합니다."""
+    status_map = {
+        'PENDING': 'Processing',    # 작업이 큐에 있거나 시작 대기 중
+        'STARTED': 'Processing',    # 작업 시작됨
+        'SUCCESS': 'Completed',     # 작업 성공
+        'FAILURE': 'Failed',      # 작업 실패
+        'RETRY': 'Processing',      # 재시도 중
+        'REVOKED': 'Cancelled',     # 사용자가 취소함
+    }
+    
+    current_status = status_map.get(task_status, 'Unknown')
+    
+    response_data = {
+        "job_id": job_id,
+        "status": current_status,
+        "task_status": task_status # Celery의 상세 상태
+    }
+
+    if task_status == 'SUCCESS':
+        # 작업이 성공하면, Celery의 결과(result)에서 파일 경로를 가져옵니다.
+        file_path = task_result 
+        
+        # 실제 환경에서는 DB에서 output_path를 가져옵니다.
+        if file_path:
+            response_data['download_url'] = f"/api/download/{job_id}"
+        else:
+            response_data['status'] = 'Error'
+            response_data['message'] = 'Task succeeded but result path is missing.'
+
+    elif task_status in ('FAILURE', 'REVOKED'):
+        response_data['message'] = str(task_result) # 실패 / 취소 사유
+        
+    return response_data
+
 # =============================
 #          Health Check (유지)
 # =============================
 
 def health(request):
+    """Liveness: 프로세스가 응답할 수 있는지만 확인합니다. (외부 의존성 확인 없음)"""
     return JsonResponse({"status": "ok"})
 
 
+def readiness(request):
+    """Readiness: Redis, Worker, 디스크, 변환 백엔드를 확인합니다. (결과는 몇 초간 캐시)"""
+    ready, checks = check_readiness()
+    return JsonResponse({"status": "ready" if ready else "unavailable", "checks": checks}, status=200 if ready else 503)
+
+
+# =============================
+#       Prometheus Metrics
+# =============================
+
+def metrics_view(request):
+    """Prometheus scrape 엔드포인트 (큐 길이, 작업 폴더 사용량 등은 scrape 시점에 계산)"""
+    return HttpResponse(render_web_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # =============================
 #      Page Rendering Views (유지)
 # =============================
@@ -87,27 +246,41 @@ def mask_ocr_page(request):
 #        PPT → PDF 
 # =============================
 # 이 함수는 연산을 수행하지 않고, Task를 위임하고 즉시 응답합니다.
-def ppt_to_pdf(request):
+# async 뷰이므로 느린 업로드/Redis 왕복 동안 워커 프로세스를 점유하지 않습니다.
+async def ppt_to_pdf(request):
     if request.method != "POST":
         return HttpResponseBadRequest("POST only")
 
-    f = request.FILES.get("file")
+    files, _ = await aread_upload_request(request)
+    f = files.get("file")
     if not f:
         return HttpResponseBadRequest("No file")
 
     # 1. 고유 ID 생성
     job_id = generate_unique_id()
+
+    # 승인 제어: 과부하이거나 클라이언트 제한을 넘으면 파일을 저장하기 전에 거절합니다.
+    client_id, _, rejected = await aadmit_request(request, "convert", file_size_units(f.size), job_id)
+    if rejected:
+        return rejected
     
     # 2. 파일 저장 (빠른 I/O만 수행)
     try:
-        in_path = save_uploaded_file_and_get_path(f, job_id)
+        in_path = await asave_uploaded_file_and_get_path(f, job_id)
     except Exception as e:
+        await arelease_client_slot(get_redis(), client_id, job_id)
         return JsonResponse({"error": f"File save failed: {e}"}, status=500)
 
     try:
         # 3. Celery Task 위임
         # 무거운 연산은 Worker에게 맡기고 바로 반환합니다.
-        task_result = exec_ppt_to_pdf_task.apply_async(args=[job_id, in_path, f.name], task_id=job_id)# type: ignore
+        try:
+            task_result = await aapply_async(
+                exec_ppt_to_pdf_task, args=[job_id, in_path, f.name], kwargs={"client_id": client_id}, task_id=job_id,
+            )
+        except Exception:
+            await arelease_client_slot(get_redis(), client_id, job_id)
+            raise
         logger.info(f"PPT to PDF job submitted: {job_id}, Celery ID: {task_result.id}")
 
         # 4. 즉시 응답 (사용자 대기 시간 없음)
@@ -128,24 +301,37 @@ def ppt_to_pdf(request):
 #       DOCX → PDF 
 # =============================
 # **이 함수 역시 Task를 위임하고 즉시 응답합니다.**
-def docx_to_pdf(request):
+async def docx_to_pdf(request):
     if request.method != "POST":
         return HttpResponseBadRequest("POST only")
 
-    f = request.FILES.get("file")
+    files, _ = await aread_upload_request(request)
+    f = files.get("file")
     if not f:
         return HttpResponseBadRequest("No file")
 
     job_id = generate_unique_id()
+
+    # 승인 제어: 과부하이거나 클라이언트 제한을 넘으면 파일을 저장하기 전에 거절합니다.
+    client_id, _, rejected = await aadmit_request(request, "convert", file_size_units(f.size), job_id)
+    if rejected:
+        return rejected
     
     try:
-        in_path = save_uploaded_file_and_get_path(f, job_id)
+        in_path = await asave_uploaded_file_and_get_path(f, job_id)
     except Exception as e:
+        await arelease_client_slot(get_redis(), client_id, job_id)
         return JsonResponse({"error": f"File save failed: {e}"}, status=500)
 
     # Celery Task 위임
     try:
-        task_result = exec_docx_to_pdf_task.apply_async(args=[job_id, in_path, f.name], task_id=job_id)# type: ignore
+        try:
+            task_result = await aapply_async(
+                exec_docx_to_pdf_task, args=[job_id, in_path, f.name], kwargs={"client_id": client_id}, task_id=job_id,
+            )
+        except Exception:
+            await arelease_client_slot(get_redis(), client_id, job_id)
+            raise
         logger.info(f"DOCX to PDF job submitted: {job_id}, Celery ID: {task_result.id}")
 
         # 즉시 응답
@@ -165,15 +351,10 @@ def docx_to_pdf(request):
 # =============================
 #         Fast Mask API
 # =============================
-@csrf_exempt
-@require_http_methods(["POST"])
-def mask_api(request):
-    f = request.FILES.get("file")
-    if not f:
-        return HttpResponseBadRequest("file field is required (PDF)")
-
+def _parse_mask_opts(request, post):
+    """마스킹 옵션 폼 필드를 엔진 옵션으로 바꿉니다. (opts, 오류 응답) 을 반환하며, 정상이면 오류 응답은 None 입니다."""
     def _get(name, default=None):
-        return request.POST.get(name, request.GET.get(name, default))
+        return post.get(name, request.GET.get(name, default))
 
     opts = {}
     if _get("mode"): opts["mode"] = _get("mode")
@@ -182,24 +363,83 @@ def mask_api(request):
         try:
             opts["mask_ratio"] = float(_get("mask_ratio"))
         except ValueError:
-             return HttpResponseBadRequest("Invalid mask_ratio format")
+             return None, HttpResponseBadRequest("Invalid mask_ratio format")
+    if _get("select_strategy"):
+        if _get("select_strategy") not in ("ratio", "per_page", "per_line", "weighted"):
+            return None, HttpResponseBadRequest("Invalid select_strategy")
+        opts["select_strategy"] = _get("select_strategy")
+    if _get("mask_count"):
+        try:
+            opts["mask_count"] = int(_get("mask_count"))
+        except ValueError:
+             return None, HttpResponseBadRequest("Invalid mask_count format")
+    if _get("output_profile"):
+        # fast: 저장 최적화 생략(빠름), balanced, compact: 최대 압축(느림), auto: 문서 크기로 결정
+        if _get("output_profile") not in ("auto", "fast", "balanced", "compact"):
+            return None, HttpResponseBadRequest("Invalid output_profile")
+        opts["output_profile"] = _get("output_profile")
+    if _get("mask_patterns"):
+        # 추가로 마스킹할 품사 열 (예: "SN+NNB,NNG+XSN")
+        try:
+            opts["mask_patterns"] = validate_mask_patterns(_get("mask_patterns"))
+        except ValueError as e:
+            return None, HttpResponseBadRequest(str(e))
+    if _get("seed"):
+        # 같은 seed면 같은 결과가 나오므로 재시도/분할 처리 시에도 결과가 일관됩니다.
+        opts["seed"] = _get("seed")
+    return opts, None
+
+
+@async_csrf_exempt
+@async_require_http_methods(["POST"])
+async def mask_api(request):
+    files, post = await aread_upload_request(request)
+    f = files.get("file")
+    if not f:
+        return HttpResponseBadRequest("file field is required (PDF)")
 
+    opts, error = _parse_mask_opts(request, post)
+    if error:
+        return error
+
+    # 페이지 수로 승인 여부와 우선순위 레인을 정하고, 클라이언트별 진행 중 작업 수로 공정 분배합니다.
+    page_count = await asyncio.to_thread(count_uploaded_pdf_pages, f)
+    # 페이지 수를 모르면 큰 문서 기준 작업량으로 추정합니다.
+    job_units = page_count or settings.MASK_LARGE_PAGE_THRESHOLD
     job_id = generate_unique_id()
+    client_id, admission, rejected = await aadmit_request(request, "mask", job_units, job_id)
+    if rejected:
+        return rejected
+
     try:
-        in_path = save_uploaded_file_and_get_path(f, job_id)
+        in_path = await asave_uploaded_file_and_get_path(f, job_id)
     except Exception as e:
+        await arelease_client_slot(get_redis(), client_id, job_id)
         return JsonResponse({"error": f"File save failed: {e}"}, status=500)
 
     try:
+        redis = get_redis()
+        queue, priority = plan_mask_job(page_count, admission.client_inflight)
+
         # Celery Task 위임
-        task_result = exec_mask_fast_task.apply_async(args=[job_id, in_path,opts, f.name], task_id=job_id)# type: ignore
-        logger.info(f"Fast Mask job submitted: {job_id}, Celery ID: {task_result.id}")
+        try:
+            task_result = await aapply_async(
+                exec_mask_fast_task,
+                args=[job_id, in_path, opts, f.name],
+                kwargs={"client_id": client_id, "page_count": page_count},
+                task_id=job_id, queue=queue, priority=priority,
+            )
+        except Exception:
+            await arelease_client_slot(redis, client_id, job_id)
+            raise
+        logger.info(f"Fast Mask job submitted: {job_id}, Celery ID: {task_result.id}, pages={page_count}, queue={queue}, priority={priority}")
 
         # 즉시 응답
         return JsonResponse({
             "status": "Job accepted and processing",
             "job_id": job_id,
             "task_id": task_result.id,
+            "page_count": page_count,
             "check_url": f"/api/status/{job_id}"
         }, status=202)
     except Exception as e:
@@ -208,25 +448,141 @@ def mask_api(request):
         # 사용자에게는 500 오류를 반환합니다.
         return JsonResponse({"error": "Failed to submit job to queue. Check Redis/Celery connection."}, status=500)
 
+# =============================
+#     Mask Preview API (동기)
+# =============================
+
+def _parse_preview_pages(value, page_count):
+    """"1,3" 처럼 1부터 센 페이지 번호 -> 0부터 센 페이지 목록. 비어 있으면 첫 페이지."""
+    if not value:
+        return [0]
+    pages = []
+    for part in value.split(","):
+        pno = int(part) - 1
+        if not 0 <= pno < page_count:
+            raise ValueError(f"Page out of range: {part.strip()} (1-{page_count})")
+        if pno not in pages:
+            pages.append(pno)
+    if len(pages) > settings.MASK_PREVIEW_MAX_PAGES:
+        raise ValueError(f"Too many pages: at most {settings.MASK_PREVIEW_MAX_PAGES} per preview")
+    return pages
+
+
+def _read_uploaded_bytes(uploaded_file):
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def _run_mask_preview(pdf_bytes, pages, opts, dpi, deadline):
+    """(스레드) 미리보기를 만들고, 끝나면 미리보기 슬롯을 반납합니다."""
+    try:
+        stats = {}
+        previews = preview_pdf_pages(pdf_bytes, pages, dpi=dpi, deadline=deadline, stats=stats, **opts)
+        record_engine_stats(stats)
+        return previews, stats
+    finally:
+        _PREVIEW_SLOTS.release()
+
+
+@async_csrf_exempt
+@async_require_http_methods(["POST"])
+async def mask_preview_api(request):
+    """선택한 페이지(기본: 첫 페이지)만 바로 마스킹하여 PNG 썸네일로 돌려줍니다.
+
+    옵션(mode, target_mode, mask_ratio 등)은 /api/mask/ 와 같고, 같은 seed 를 쓰면 전체 작업 결과와 같은 페이지가 나옵니다.
+    Celery 큐를 거치지 않으며, MASK_PREVIEW_TIME_BUDGET 을 넘기면 남은 페이지는 건너뜁니다(truncated).
+    """
+    started = time.monotonic()
+    # 거절/실패한 요청도 응답 시간 분포에 들어가도록 결과와 관계없이 기록합니다.
+    result = "error"
+    try:
+        response, result = await _amask_preview(request, started)
+        return response
+    finally:
+        PREVIEW_DURATION.labels(result=result).observe(time.monotonic() - started)
+
+
+async def _amask_preview(request, started):
+    """미리보기 응답과 메트릭용 결과(ok, truncated, invalid, busy, timeout, error)를 반환합니다."""
+    files, post = await aread_upload_request(request)
+    f = files.get("file")
+    if not f:
+        return HttpResponseBadRequest("file field is required (PDF)"), "invalid"
+
+    opts, error = _parse_mask_opts(request, post)
+    if error:
+        return error, "invalid"
+    page_count = await asyncio.to_thread(count_uploaded_pdf_pages, f)
+    if not page_count:
+        return HttpResponseBadRequest("Invalid or empty PDF"), "invalid"
+    try:
+        pages = _parse_preview_pages(post.get("pages", request.GET.get("pages")), page_count)
+        dpi = int(post.get("dpi", settings.MASK_PREVIEW_DPI))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e)), "invalid"
+    dpi = min(150, max(18, dpi))
+    pdf_bytes = await asyncio.to_thread(_read_uploaded_bytes, f)
+
+    if not _PREVIEW_SLOTS.acquire(blocking=False):
+        response = JsonResponse({"error": "Too many previews in progress", "retry_after": 1}, status=429)
+        response["Retry-After"] = "1"
+        return response, "busy"
+
+    deadline = started + settings.MASK_PREVIEW_TIME_BUDGET
+    try:
+        # shield: 시간 초과로 기다리기를 그만둬도 스레드 작업은 취소하지 않아야 슬롯이 반납됩니다.
+        previews, stats = await asyncio.wait_for(
+            asyncio.shield(asyncio.to_thread(_run_mask_preview, pdf_bytes, pages, opts, dpi, deadline)),
+            timeout=max(0.1, settings.MASK_PREVIEW_TIMEOUT - (time.monotonic() - started)),
+        )
+    except asyncio.TimeoutError:
+        return JsonResponse({"error": "Preview timed out. Try fewer pages or run the full job."}, status=504), "timeout"
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e)), "invalid"
+    except Exception:
+        logger.exception("Mask preview failed.")
+        return JsonResponse({"error": "Preview failed"}, status=500), "error"
+
+    response = JsonResponse({
+        "page_count": page_count,
+        "truncated": stats["truncated"],
+        "elapsed_ms": int((time.monotonic() - started) * 1000),
+        "pages": [
+            {
+                "page": p["page"] + 1,
+                "rects": p["rects"],
+                "image": "data:image/png;base64," + base64.b64encode(p["png"]).decode("ascii"),
+            }
+            for p in previews
+        ],
+    })
+    response["Cache-Control"] = "no-store"
+    return response, "truncated" if stats["truncated"] else "ok"
+
+
 # =============================
 #         AI OCR Mask API 
 # =============================
-@csrf_exempt
-def mask_ai_api(request):
-    if request.method != "POST" or not request.FILES.get("file"):
+@async_csrf_exempt
+async def mask_ai_api(request):
+    if request.method != "POST":
         return HttpResponseBadRequest("POST method and file upload required")
 
-    f = request.FILES["file"]
+    files, _ = await aread_upload_request(request)
+    if not files.get("file"):
+        return HttpResponseBadRequest("POST method and file upload required")
+
+    f = files["file"]
     
     job_id = generate_unique_id()
     try:
-        in_path = save_uploaded_file_and_get_path(f, job_id)
+        in_path = await asave_uploaded_file_and_get_path(f, job_id)
     except Exception as e:
         return JsonResponse({"error": f"File save failed: {e}"}, status=500)
 
     try:
     # Celery Task 위임
-        task_result = exec_mask_ai_ocr_task.apply_async(args=[job_id, in_path, f.name], task_id=job_id)# type: ignore
+        task_result = await aapply_async(exec_mask_ai_ocr_task, args=[job_id, in_path, f.name], task_id=job_id)
         logger.info(f"AI OCR Mask job submitted: {job_id}, Celery ID: {task_result.id}")
 
         # 즉시 응답
@@ -247,63 +603,104 @@ def mask_ai_api(request):
 #         NEW: Task Status API
 # ===============================================
 
-@require_http_methods(["GET"])
-def get_job_status(request, job_id):
+@async_require_http_methods(["GET"])
+async def get_job_status(request, job_id):
     """
     클라이언트가 작업 상태를 주기적으로 확인하는 API (Polling)
     """
     job_id = str(job_id)
-    # Celery ID를 사용하여 Task 상태 조회
-    task = AsyncResult(job_id)
+    # Celery ID를 사용하여 Task 상태 조회 (공유 Redis 풀 사용, 종료 상태는 캐시)
+    task_status, task_result = await aget_task_state(job_id)
 
-    status_map = {
-        'PENDING': 'Processing',    # 작업이 큐에 있거나 시작 대기 중
-        'STARTED': 'Processing',    # 작업 시작됨
-        'SUCCESS': 'Completed',     # 작업 성공
-        'FAILURE': 'Failed',      # 작업 실패
-        'RETRY': 'Processing',      # 재시도 중
-    }
-    
-    current_status = status_map.get(task.status, 'Unknown')
-    
-    response_data = {
-        "job_id": job_id,
-        "status": current_status,
-        "task_status": task.status # Celery의 상세 상태
-    }
+    response_data = _build_status_response(job_id, task_status, task_result)
+    if request.GET.get("timing"):
+        # ?timing=1: 큐 대기 / 처리 시각 (부하 테스트에서 대기 시간과 처리 시간을 나눌 때 사용)
+        response_data["timing"] = await aget_job_timing(job_id)
+    return JsonResponse(response_data)
 
-    if task.status == 'SUCCESS':
-        # 작업이 성공하면, Celery의 결과(result)에서 파일 경로를 가져옵니다.
-        file_path = task.result 
-        
-        # 실제 환경에서는 DB에서 output_path를 가져옵니다.
-        if file_path:
-            response_data['download_url'] = f"/api/download/{job_id}"
-        else:
-            response_data['status'] = 'Error'
-            response_data['message'] = 'Task succeeded but result path is missing.'
 
-    elif task.status == 'FAILURE':
-        response_data['message'] = str(task.result) # 실패 메시지
-        
-    return JsonResponse(response_data)
+# ===============================================
+#         NEW: Cancel API
+# ===============================================
+
+@async_csrf_exempt
+@async_require_http_methods(["POST"])
+async def cancel_job(request, job_id):
+    """
+    작업 취소 API (취소 버튼 / 탭을 닫을 때 navigator.sendBeacon 으로 호출)
+    큐에서 기다리던 작업은 시작하자마자, 실행 중인 작업은 다음 페이지(또는 확인 주기)에서 멈춥니다.
+    """
+    job_id = str(job_id)
+    task_status, task_result = await aget_task_state(job_id)
+    if task_status in TERMINAL_STATES:
+        response_data = _build_status_response(job_id, task_status, task_result)
+        response_data['message'] = 'Job already finished'
+        return JsonResponse(response_data, status=409)
+
+    await arequest_cancel(get_redis(), job_id)
+    logger.info(f"Cancel requested for job {job_id}")
+    return JsonResponse({"job_id": job_id, "status": "Cancelling", "task_status": task_status}, status=202)
+
+
+# ===============================================
+#         NEW: Batch Task Status API
+# ===============================================
+
+@async_csrf_exempt
+@async_require_http_methods(["GET", "POST"])
+async def get_job_status_batch(request):
+    """
+    여러 작업의 상태를 한 번에 조회하는 API
+    - GET  /api/status/batch/?job_id=<id>&job_id=<id>  (또는 ?job_ids=<id>,<id>)
+    - POST /api/status/batch/  {"job_ids": ["<id>", ...]}
+    모든 작업은 Redis MGET 한 번으로 조회됩니다.
+    """
+    if request.method == "POST":
+        try:
+            body = json.loads(request.body or b"{}")
+        except ValueError:
+            return HttpResponseBadRequest("Invalid JSON body")
+        raw_ids = body.get("job_ids") if isinstance(body, dict) else None
+        if not isinstance(raw_ids, list):
+            return HttpResponseBadRequest("job_ids list is required")
+    else:
+        raw_ids = request.GET.getlist("job_id")
+        for value in request.GET.getlist("job_ids"):
+            raw_ids += [x for x in value.split(",") if x]
+
+    if not raw_ids:
+        return HttpResponseBadRequest("job_ids is required")
+    if len(raw_ids) > settings.STATUS_BATCH_MAX_IDS:
+        return HttpResponseBadRequest(f"Too many job_ids (max {settings.STATUS_BATCH_MAX_IDS})")
+
+    # 단일 조회 API(<uuid:job_id>)와 같은 형식만 허용합니다.
+    job_ids = []
+    for raw in raw_ids:
+        try:
+            job_id = str(uuid.UUID(str(raw)))
+        except ValueError:
+            return HttpResponseBadRequest(f"Invalid job_id: {raw}")
+        if job_id not in job_ids:
+            job_ids.append(job_id)
+
+    states = await aget_task_states(job_ids)
+    jobs = [_build_status_response(job_id, *states[job_id]) for job_id in job_ids]
+    return JsonResponse({"jobs": jobs})
 
 
 # ================================================
 #         NEW: Result Download API
 # ================================================
 
-@require_http_methods(["GET"])
+@async_require_http_methods(["GET"])
 # download_result 함수 전체 수정
-def download_result(request, job_id):
+async def download_result(request, job_id):
     job_id = str(job_id)
-    task = AsyncResult(job_id)
+    task_status, result_data = await aget_task_state(job_id)
     
-    if task.status != 'SUCCESS':
+    if task_status != 'SUCCESS':
         return JsonResponse({"error": "Job is not completed yet"}, status=400)
     
-    result_data = task.result 
-    
     # 예전 버전 호환성을 위해 dict인지 확인
     if isinstance(result_data, dict):
         result_path = result_data['path']
@@ -312,25 +709,45 @@ def download_result(request, job_id):
         result_path = result_data
         original_name = "converted.pdf" # 비상용 이름
 
-    if not result_path or not os.path.exists(result_path):
+    if is_blob_ref(result_path):
+        return await _download_blob_result(job_id, result_path, original_name)
+
+    if not result_path or not await asyncio.to_thread(os.path.exists, result_path):
         return JsonResponse({"error": "File not found"}, status=404)
 
     try:
-        with open(result_path, "rb") as f:
-            file_data = f.read()
+        file_size = await asyncio.to_thread(os.path.getsize, result_path)
 
-        # 서버 청소
+        # 파일 전체를 메모리에 올리지 않고 청크 단위로 스트리밍합니다.
+        # 서버 청소(작업 폴더 삭제)는 전송이 끝난 뒤 수행됩니다.
         job_dir = os.path.dirname(result_path)
-        shutil.rmtree(job_dir, ignore_errors=True)
         
         # 한글 파일명 깨짐 방지 처리
         encoded_filename = escape_uri_path(original_name)
         
-        response = HttpResponse(file_data, content_type='application/pdf')
+        response = StreamingHttpResponse(_stream_file_and_cleanup(result_path, job_dir), content_type='application/pdf')
+        response['Content-Length'] = str(file_size)
         # 파일명을 여기서 설정해줍니다.
         response['Content-Disposition'] = f'attachment; filename="{encoded_filename}"'
         return response
 
     except Exception as e:
         logger.error(f"Download error: {e}")
-        return JsonResponse({"error": "Server error"}, status=500)
\ No newline at end of file
+        return JsonResponse({"error": "Server error"}, status=500)
+
+
+async def _download_blob_result(job_id, result_ref, original_name):
+    """Blob 저장소에 저장된 결과를 스트리밍합니다. (전송 후 작업의 결과 참조 반납)"""
+    store = get_blob_store()
+    try:
+        file_size = await asyncio.to_thread(store.size, result_ref)
+    except Exception:
+        return JsonResponse({"error": "File not found"}, status=404)
+
+    # 한글 파일명 깨짐 방지 처리
+    encoded_filename = escape_uri_path(original_name)
+
+    response = StreamingHttpResponse(_stream_blob_and_release(result_ref, job_id), content_type='application/pdf')
+    response['Content-Length'] = str(file_size)
+    response['Content-Disposition'] = f'attachment; filename="{encoded_filename}"'
+    return response